@@ -0,0 +1,237 @@
+"""Record or synthesize F-D0047 fixtures for the offline benchmarks.
+
+With an API key the fixtures are recorded from the live CWA API:
+
+    python benchmarks/record_fixtures.py --api-key CWA-XXXX
+
+Without one, payloads with the same schema and sizes are synthesized from a
+fixed seed, so the benchmarks can run without network access.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+import gzip
+import json
+import math
+from pathlib import Path
+import random
+import ssl
+import urllib.parse
+import urllib.request
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+CERT_PATH = (
+    Path(__file__).parents[1]
+    / "custom_components"
+    / "taiwan_weather"
+    / "opendata-cwa-gov-tw.pem"
+)
+API_BASE_URL = "https://opendata.cwa.gov.tw/api/v1/rest/datastore"
+
+# (縣市, 資料集, 預報長度, 鄉鎮市區)
+DATASETS = [
+    ("臺北市", "F-D0047-061", "three_days", ["北投區", "士林區", "內湖區", "中山區", "大同區", "松山區", "南港區", "中正區", "萬華區", "信義區", "大安區", "文山區"]),
+    ("臺北市", "F-D0047-063", "weekly", ["北投區", "士林區", "內湖區", "中山區", "大同區", "松山區", "南港區", "中正區", "萬華區", "信義區", "大安區", "文山區"]),
+    ("新竹市", "F-D0047-053", "three_days", ["北區", "香山區", "東區"]),
+    ("新竹市", "F-D0047-055", "weekly", ["北區", "香山區", "東區"]),
+    ("連江縣", "F-D0047-081", "three_days", ["南竿鄉", "北竿鄉", "莒光鄉", "東引鄉"]),
+    ("連江縣", "F-D0047-083", "weekly", ["南竿鄉", "北竿鄉", "莒光鄉", "東引鄉"]),
+    ("臺灣", "F-D0047-089", "three_days", ["宜蘭縣", "花蓮縣", "臺東縣", "澎湖縣", "金門縣", "連江縣", "臺北市", "新北市", "桃園市", "臺中市", "臺南市", "高雄市", "基隆市", "新竹縣", "新竹市", "苗栗縣", "彰化縣", "南投縣", "雲林縣", "嘉義縣", "嘉義市", "屏東縣"]),
+]
+
+TZ = timezone(timedelta(hours=8))
+ISSUE_TIME = datetime(2025, 3, 10, 17, tzinfo=TZ)
+WIND_DIRECTIONS = ["偏北風", "東北風", "偏東風", "東南風", "偏南風", "西南風", "偏西風", "西北風"]
+WEATHER = {
+    "01": "晴",
+    "02": "晴時多雲",
+    "03": "多雲時晴",
+    "04": "多雲",
+    "07": "陰天",
+    "08": "多雲短暫陣雨",
+    "15": "多雲短暫陣雨或雷雨",
+    "24": "晴有霧",
+}
+
+
+def _weather(rng: random.Random) -> dict[str, str]:
+    code = rng.choice(list(WEATHER))
+    return {"Weather": WEATHER[code], "WeatherCode": code}
+
+
+def _three_days_elements(rng: random.Random) -> list[dict]:
+    """Synthesize the elements of a three-day township forecast."""
+    start = ISSUE_TIME + timedelta(hours=1)
+    hours = [start + timedelta(hours=hour) for hour in range(73)]
+    base = rng.uniform(12, 30)
+    temperature = [
+        round(base + 4 * math.sin((time.hour - 8) / 24 * 2 * math.pi) + rng.uniform(-1, 1))
+        for time in hours
+    ]
+
+    def hourly(name, value):
+        return {
+            "ElementName": name,
+            "Time": [
+                {"DataTime": time.isoformat(), "ElementValue": [value(index)]}
+                for index, time in enumerate(hours)
+            ],
+        }
+
+    def interval(name, value, step=3):
+        times = []
+        time = start
+        while time < hours[-1]:
+            end = time + timedelta(hours=step)
+            times.append(
+                {"StartTime": time.isoformat(), "EndTime": end.isoformat(), "ElementValue": [value()]}
+            )
+            time = end
+        return {"ElementName": name, "Time": times}
+
+    def wind(_index):
+        speed = rng.randint(1, 9)
+        return {"WindSpeed": str(speed), "BeaufortScale": str(speed // 2 + 1)}
+
+    return [
+        hourly("溫度", lambda i: {"Temperature": str(temperature[i])}),
+        hourly("露點溫度", lambda i: {"DewPoint": str(temperature[i] - rng.randint(2, 8))}),
+        hourly("相對濕度", lambda i: {"RelativeHumidity": str(rng.randint(55, 98))}),
+        hourly("體感溫度", lambda i: {"ApparentTemperature": str(temperature[i] + rng.randint(-2, 3))}),
+        hourly(
+            "舒適度指數",
+            lambda i: {
+                "ComfortIndex": str(temperature[i] + 2),
+                "ComfortIndexDescription": rng.choice(["舒適", "稍有寒意", "悶熱"]),
+            },
+        ),
+        hourly("風速", wind),
+        hourly("風向", lambda i: {"WindDirection": rng.choice(WIND_DIRECTIONS)}),
+        interval("3小時降雨機率", lambda: {"ProbabilityOfPrecipitation": str(rng.randrange(0, 101, 10))}),
+        interval("天氣現象", lambda: _weather(rng)),
+        interval(
+            "天氣預報綜合描述",
+            lambda: {
+                "WeatherDescription": f"{rng.choice(list(WEATHER.values()))}。降雨機率{rng.randrange(0, 100, 10)}%。溫度攝氏{rng.randint(15, 30)}度。"
+            },
+        ),
+    ]
+
+
+def _weekly_elements(rng: random.Random) -> list[dict]:
+    """Synthesize the elements of a weekly township forecast."""
+    start = ISSUE_TIME.replace(hour=18)
+    slots = [start + timedelta(hours=12 * index) for index in range(14)]
+    base = {slot: rng.randint(14, 30) for slot in slots}
+
+    def interval(name, value):
+        return {
+            "ElementName": name,
+            "Time": [
+                {
+                    "StartTime": slot.isoformat(),
+                    "EndTime": (slot + timedelta(hours=12)).isoformat(),
+                    "ElementValue": [value(slot)],
+                }
+                for slot in slots
+            ],
+        }
+
+    def precipitation(slot):
+        # 一週預報的部分時段沒有降雨機率，以 "-" 表示
+        if slot.hour == 18 and rng.random() < 0.2:
+            return {"ProbabilityOfPrecipitation": "-"}
+        return {"ProbabilityOfPrecipitation": str(rng.randrange(0, 101, 10))}
+
+    return [
+        interval("平均溫度", lambda slot: {"Temperature": str(base[slot])}),
+        interval("最高溫度", lambda slot: {"MaxTemperature": str(base[slot] + 3)}),
+        interval("最低溫度", lambda slot: {"MinTemperature": str(base[slot] - 3)}),
+        interval("平均露點溫度", lambda slot: {"DewPoint": str(base[slot] - 5)}),
+        interval("平均相對濕度", lambda slot: {"RelativeHumidity": str(rng.randint(60, 95))}),
+        interval("最高體感溫度", lambda slot: {"MaxApparentTemperature": str(base[slot] + 4)}),
+        interval("最低體感溫度", lambda slot: {"MinApparentTemperature": str(base[slot] - 4)}),
+        interval(
+            "最大舒適度指數",
+            lambda slot: {"MaxComfortIndex": str(base[slot] + 2), "MaxComfortIndexDescription": "舒適"},
+        ),
+        interval(
+            "最小舒適度指數",
+            lambda slot: {"MinComfortIndex": str(base[slot] - 2), "MinComfortIndexDescription": "稍有寒意"},
+        ),
+        interval(
+            "風速",
+            lambda slot: {"WindSpeed": str(rng.randint(1, 8)), "BeaufortScale": str(rng.randint(1, 5))},
+        ),
+        interval("風向", lambda slot: {"WindDirection": rng.choice(WIND_DIRECTIONS)}),
+        interval("12小時降雨機率", precipitation),
+        interval("天氣現象", lambda slot: _weather(rng)),
+        interval("紫外線指數", lambda slot: {"UVIndex": str(rng.randint(1, 10)), "UVExposureLevel": "中量級"}),
+        interval(
+            "天氣預報綜合描述",
+            lambda slot: {"WeatherDescription": f"{rng.choice(list(WEATHER.values()))}。溫度攝氏{base[slot]}度。"},
+        ),
+    ]
+
+
+def synthesize(city: str, dataset_id: str, duration: str, locations: list[str]) -> dict:
+    """Build a payload with the same layout as a F-D0047 response."""
+    rng = random.Random(dataset_id)
+    elements = _three_days_elements if duration == "three_days" else _weekly_elements
+    return {
+        "success": "true",
+        "result": {"resource_id": dataset_id, "fields": []},
+        "records": {
+            "Locations": [
+                {
+                    "DatasetDescription": "臺灣各鄉鎮市區預報資料" if duration == "three_days" else "臺灣各鄉鎮市區一週預報資料",
+                    "LocationsName": city,
+                    "Dataid": dataset_id.removeprefix("F-"),
+                    "Location": [
+                        {
+                            "LocationName": name,
+                            "Geocode": str(6300000 + index * 100),
+                            "Latitude": f"{25.0 + rng.uniform(-0.2, 0.2):.6f}",
+                            "Longitude": f"{121.5 + rng.uniform(-0.2, 0.2):.6f}",
+                            "WeatherElement": elements(rng),
+                        }
+                        for index, name in enumerate(locations)
+                    ],
+                }
+            ]
+        },
+    }
+
+
+def record(api_key: str, dataset_id: str) -> dict:
+    """Fetch a whole dataset from the live API."""
+    query = urllib.parse.urlencode({"Authorization": api_key})
+    context = ssl.create_default_context(cafile=str(CERT_PATH))
+    with urllib.request.urlopen(
+        f"{API_BASE_URL}/{dataset_id}?{query}", context=context, timeout=60
+    ) as response:
+        return json.load(response)
+
+
+def main() -> None:
+    """Write every fixture to the fixtures directory."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--api-key", help="record from the live API with this key")
+    args = parser.parse_args()
+
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    for city, dataset_id, duration, locations in DATASETS:
+        if args.api_key:
+            data = record(args.api_key, dataset_id)
+        else:
+            data = synthesize(city, dataset_id, duration, locations)
+        path = FIXTURES_DIR / f"{dataset_id}.json.gz"
+        raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+        path.write_bytes(gzip.compress(raw, mtime=0))
+        print(f"{path.name}: {len(raw) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
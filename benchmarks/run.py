@@ -0,0 +1,209 @@
+"""Offline benchmarks for the Taiwan Weather parse and align hot path.
+
+Run from the repository root in an environment with Home Assistant installed:
+
+    python benchmarks/run.py
+    python benchmarks/run.py --save baseline.json
+    python benchmarks/run.py --compare baseline.json --threshold 1.25
+
+Each benchmark reports the median time per operation and the peak memory
+traced while running it once. With --compare the run exits with status 1 if
+any benchmark got slower than the saved baseline by more than the threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Callable
+from datetime import datetime
+import gzip
+import json
+from pathlib import Path
+import pickle
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+ROOT = Path(__file__).parents[1]
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+sys.path.insert(0, str(ROOT))
+
+from custom_components.taiwan_weather.coordinator import LocationForecast  # noqa: E402
+from custom_components.taiwan_weather.cwa_data_parser import (  # noqa: E402
+    CWADataParser,
+    CWAWeeklyDataParser,
+    parse_response,
+)
+from custom_components.taiwan_weather.hub import _slice_location  # noqa: E402
+
+THREE_DAYS_FIXTURES = ["F-D0047-061", "F-D0047-053", "F-D0047-081", "F-D0047-089"]
+WEEKLY_FIXTURES = ["F-D0047-063", "F-D0047-055", "F-D0047-083"]
+GETTERS = [
+    "get_condition",
+    "get_temperature",
+    "get_apparent_temperature",
+    "get_humidity",
+    "get_wind_direction",
+    "get_wind_speed",
+    "get_precipitation_probability",
+    "get_dew_point",
+    "get_comfort_index",
+    "get_comfort_index_description",
+    "get_weather_description",
+]
+
+
+def load_fixture(dataset_id: str) -> bytes:
+    """Return the raw JSON bytes of a recorded fixture."""
+    return gzip.decompress((FIXTURES_DIR / f"{dataset_id}.json.gz").read_bytes())
+
+
+def slice_all(data: dict[str, Any]) -> list[dict[str, Any]]:
+    """Slice a dataset into one response per location, like the fetcher does."""
+    return [
+        _slice_location(data, location)
+        for location in data["records"]["Locations"][0]["Location"]
+    ]
+
+
+def loaded_parser(api_response: dict[str, Any]) -> CWADataParser:
+    """Return a parser with aligned and indexed data."""
+    parser = CWADataParser()
+    parser.load_api_response(api_response)
+    parser.parse_weather_data()
+    return parser
+
+
+def loaded_weekly_parser(api_response: dict[str, Any]) -> CWAWeeklyDataParser:
+    """Return a weekly parser with aligned data."""
+    parser = CWAWeeklyDataParser()
+    parser.load_api_response(api_response)
+    parser.parse_twice_daily_forecast()
+    return parser
+
+
+def refresh(raw: bytes) -> None:
+    """Do the CPU work of one coordinator refresh per location."""
+    for api_response in slice_all(json.loads(raw)):
+        location = LocationForecast(api_response["records"]["Locations"][0]["Location"][0]["LocationName"])
+        location.load_weather_data(api_response, None)
+        slot = datetime.fromisoformat(location.parser._get_base_times()[0])
+        location.build_snapshot(slot, slot)
+
+
+def measure(func: Callable[[], Any], min_time: float) -> dict[str, float]:
+    """Time a function and trace the peak memory of a single call."""
+    func()  # 預熱快取
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time / 5:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+
+    return {"seconds": statistics.median(samples), "peak_bytes": peak}
+
+
+def build_benchmarks() -> dict[str, Callable[[], Any]]:
+    """Return every benchmark keyed by name."""
+    benchmarks: dict[str, Callable[[], Any]] = {}
+    for dataset_id in THREE_DAYS_FIXTURES:
+        raw = load_fixture(dataset_id)
+        data = json.loads(raw)
+        api_response = slice_all(data)[0]
+        parser = loaded_parser(api_response)
+        now_time = parser._get_base_times()[len(parser._get_base_times()) // 2]
+
+        benchmarks[f"{dataset_id}/decode"] = lambda raw=raw: json.loads(raw)
+        benchmarks[f"{dataset_id}/slice"] = lambda data=data: slice_all(data)
+        benchmarks[f"{dataset_id}/align_time"] = (
+            lambda parser=parser, api_response=api_response: parser._align_time(api_response)
+        )
+        benchmarks[f"{dataset_id}/parse_weather_data"] = (
+            lambda api_response=api_response: loaded_parser(api_response)
+        )
+        benchmarks[f"{dataset_id}/parse_weather_data_warm"] = parser.parse_weather_data
+        for getter in GETTERS:
+            benchmarks[f"{dataset_id}/{getter}"] = (
+                lambda func=getattr(parser, getter), now_time=now_time: func(now_time)
+            )
+        benchmarks[f"{dataset_id}/refresh"] = lambda raw=raw: refresh(raw)
+        benchmarks[f"{dataset_id}/parse_response"] = lambda raw=raw: parse_response(raw, None)
+        result = pickle.dumps(parse_response(raw, None))
+        benchmarks[f"{dataset_id}/parse_response_result"] = (
+            lambda result=result: pickle.loads(result)
+        )
+
+    for dataset_id in WEEKLY_FIXTURES:
+        raw = load_fixture(dataset_id)
+        api_response = slice_all(json.loads(raw))[0]
+        parser = loaded_weekly_parser(api_response)
+
+        benchmarks[f"{dataset_id}/decode"] = lambda raw=raw: json.loads(raw)
+        benchmarks[f"{dataset_id}/align_periods"] = (
+            lambda parser=parser, api_response=api_response: parser._align_periods(api_response)
+        )
+        benchmarks[f"{dataset_id}/parse_twice_daily"] = (
+            lambda api_response=api_response: loaded_weekly_parser(api_response)
+        )
+        benchmarks[f"{dataset_id}/parse_daily_warm"] = parser.parse_daily_forecast
+    return benchmarks
+
+
+def main() -> int:
+    """Run the benchmarks and optionally compare against a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks containing this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to spend per benchmark")
+    parser.add_argument("--save", type=Path, help="write the results to a JSON file")
+    parser.add_argument("--compare", type=Path, help="compare against results saved with --save")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown ratio")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else {}
+    results: dict[str, dict[str, float]] = {}
+    regressions = []
+
+    print(f"{'benchmark':<52} {'time':>12} {'peak':>10} {'vs base':>8}")
+    for name, func in build_benchmarks().items():
+        if args.filter not in name:
+            continue
+        result = results[name] = measure(func, args.min_time)
+        ratio = ""
+        if name in baseline:
+            change = result["seconds"] / baseline[name]["seconds"]
+            ratio = f"{change:.2f}x"
+            if change > args.threshold:
+                regressions.append(name)
+        print(
+            f"{name:<52} {result['seconds'] * 1e6:>10.1f}µs "
+            f"{result['peak_bytes'] / 1024:>7.0f}KiB {ratio:>8}"
+        )
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    if regressions:
+        print(f"Regressions over {args.threshold}x: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Local stand-in for the CWA datastore API, for load and soak testing.
+
+Replays the fixtures in benchmarks/fixtures on the same path as the real API:
+
+    python benchmarks/standin_server.py --port 8765 --delay 0.5 --fail-rate 0.05
+
+Then add the integration with advanced mode enabled and set the API URL to
+http://127.0.0.1:8765/api/v1/rest/datastore. No API quota is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import defaultdict, deque
+import gzip
+import hashlib
+import json
+import logging
+from pathlib import Path
+import random
+import time
+from typing import Any
+
+from aiohttp import web
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+_LOGGER = logging.getLogger("cwa_standin")
+
+
+class StandinAPI:
+    """Serve recorded datasets with configurable latency and failures."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        """Load every fixture and keep the failure settings."""
+        self.args = args
+        self.datasets: dict[str, dict[str, Any]] = {
+            path.name.removesuffix(".json.gz"): json.loads(gzip.decompress(path.read_bytes()))
+            for path in FIXTURES_DIR.glob("*.json.gz")
+        }
+        self.requests: dict[str, deque[float]] = defaultdict(deque)
+        self.counters: dict[str, int] = defaultdict(int)
+
+    async def handle_datastore(self, request: web.Request) -> web.StreamResponse:
+        """Answer a /api/v1/rest/datastore/{dataset_id} request."""
+        args = self.args
+        dataset_id = request.match_info["dataset_id"]
+        api_key = request.query.get("Authorization") or request.headers.get("Authorization")
+        self.counters["requests"] += 1
+
+        if args.delay or args.jitter:
+            await asyncio.sleep(max(args.delay + random.uniform(-args.jitter, args.jitter), 0))
+
+        if not api_key or (args.api_key and api_key not in args.api_key):
+            self.counters["unauthorized"] += 1
+            return web.json_response(
+                {"success": "false", "message": "Authorization is invalid"}, status=401
+            )
+
+        if args.rate_limit and self._rate_limited(api_key):
+            self.counters["rate_limited"] += 1
+            return web.json_response(
+                {"message": "API rate limit exceeded"},
+                status=429,
+                headers={"Retry-After": str(args.retry_after)},
+            )
+
+        if random.random() < args.fail_rate:
+            self.counters["server_errors"] += 1
+            return web.json_response({"message": "Internal Server Error"}, status=500)
+
+        if random.random() < args.false_rate:
+            self.counters["unsuccessful"] += 1
+            return web.json_response({"success": "false", "message": "Data is not available"})
+
+        if (data := self.datasets.get(dataset_id)) is None:
+            self.counters["not_found"] += 1
+            return web.json_response(
+                {"success": "false", "message": "Resource not found"}, status=404
+            )
+
+        body = json.dumps(
+            self._filter_locations(data, request.query.get("LocationName")),
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.counters["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        response = web.Response(
+            body=body, content_type="application/json", headers={"ETag": etag}
+        )
+        response.enable_compression()
+        self.counters["ok"] += 1
+        return response
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        """Return the request counters."""
+        return web.json_response(self.counters)
+
+    def _rate_limited(self, api_key: str) -> bool:
+        """Return True if the key exceeded the per-minute request budget."""
+        now = time.monotonic()
+        history = self.requests[api_key]
+        while history and now - history[0] > 60:
+            history.popleft()
+        if len(history) >= self.args.rate_limit:
+            return True
+        history.append(now)
+        return False
+
+    @staticmethod
+    def _filter_locations(data: dict[str, Any], location_name: str | None) -> dict[str, Any]:
+        """Keep only the requested locations, like the LocationName parameter does."""
+        if not location_name:
+            return data
+        wanted = set(location_name.split(","))
+        locations = data["records"]["Locations"][0]
+        return {
+            **data,
+            "records": {
+                **data["records"],
+                "Locations": [
+                    {
+                        **locations,
+                        "Location": [
+                            location
+                            for location in locations["Location"]
+                            if location["LocationName"] in wanted
+                        ],
+                    }
+                ],
+            },
+        }
+
+
+def main() -> None:
+    """Start the stand-in server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +/- seconds added to the delay")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--false-rate", type=float, default=0.0, help='fraction of requests answered with success "false"')
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests per minute per key before 429")
+    parser.add_argument("--retry-after", type=int, default=60, help="Retry-After seconds sent with 429")
+    parser.add_argument("--api-key", action="append", help="accepted key, may be repeated (default: any)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    api = StandinAPI(args)
+    _LOGGER.info("Serving %s", ", ".join(sorted(api.datasets)))
+
+    app = web.Application()
+    app.router.add_get("/api/v1/rest/datastore/{dataset_id}", api.handle_datastore)
+    app.router.add_get("/stats", api.handle_stats)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
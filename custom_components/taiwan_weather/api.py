@@ -1,37 +1,227 @@
 """CWA API Client for Home Assistant."""
 
 import asyncio
+from concurrent.futures import BrokenExecutor, Executor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+import hashlib
+import json
 import logging
 from pathlib import Path
+import ssl
+import time
 from types import TracebackType
 from typing import Any
 
+import aiohttp
 import requests
 
-from .const import API_BASE_URL, API_LOCATION_MAPPING
+from .const import (
+    API_BASE_URL,
+    API_MAX_RETRIES,
+    API_RATE_BURST,
+    API_RATE_LIMIT,
+    API_RETRY_BASE_DELAY,
+    API_RETRY_MAX_DELAY,
+    API_TIMEOUT,
+    PROCESS_POOL_MIN_BYTES,
+)
+from .cwa_data_parser import ForecastTable, parse_response
+from .locations import COUNTRY, get_location_index
+from .scheduler import jittered_backoff
 
 _LOGGER = logging.getLogger(__name__)
 
+CERT_PATH = Path(__file__).parent / "opendata-cwa-gov-tw.pem"
+
+# 視為暫時性錯誤、值得重試的HTTP狀態碼
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_SSL_CONTEXT: ssl.SSLContext | None = None
+
+
+def _create_ssl_context() -> ssl.SSLContext | None:
+    """Create an SSL context pinned to the bundled TWCA certificate."""
+    if not CERT_PATH.exists():
+        _LOGGER.warning("TWCA certificate not found at %s, using system default", CERT_PATH)
+        return None
+    return ssl.create_default_context(cafile=str(CERT_PATH))
+
+
+async def async_get_ssl_context() -> ssl.SSLContext | None:
+    """Return the shared pinned SSL context, loading the certificate once."""
+    global _SSL_CONTEXT  # noqa: PLW0603
+    if _SSL_CONTEXT is None:
+        # 讀取憑證檔屬於阻塞操作，只在第一次時交給執行緒處理
+        _SSL_CONTEXT = await asyncio.to_thread(_create_ssl_context)
+    return _SSL_CONTEXT
+
+
+class _RetryableStatusError(Exception):
+    """A response status worth retrying, such as 429 or 5xx."""
+
+    def __init__(self, status: int, retry_after: float | None) -> None:
+        """Initialize the error."""
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+_TRANSIENT_ERRORS = (
+    _RetryableStatusError,
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+    asyncio.TimeoutError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+
+
+def _parse_retry_after(headers: dict[str, str]) -> float | None:
+    """Return the Retry-After header in seconds, if given as a number."""
+    try:
+        return float(headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class _TokenBucket:
+    """Token bucket limiting the request rate of one API key."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Initialize the bucket full."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait for a token and return the seconds spent waiting."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+# 同一API金鑰的所有client共用一個限流器，避免在發布整點同時送出大量請求
+_RATE_LIMITERS: dict[str, _TokenBucket] = {}
+
+
+def _get_rate_limiter(api_key: str) -> _TokenBucket:
+    """Return the rate limiter shared by every client of an API key."""
+    if (limiter := _RATE_LIMITERS.get(api_key)) is None:
+        limiter = _RATE_LIMITERS[api_key] = _TokenBucket(API_RATE_LIMIT, API_RATE_BURST)
+    return limiter
+
+
+@dataclass(slots=True)
+class _CachedResponse:
+    """Validators and decoded body of the last response for a URL."""
+
+    key: str
+    digest: bytes
+    etag: str | None
+    last_modified: str | None
+    size: int
+    data: dict[str, Any]
+    tables: dict[str, ForecastTable] | None = None
+
+
+def resolve_endpoint(
+    city: str,
+    district: str | None,
+    forecast_duration: str = "three_days",
+    forecast_type: str = "鄉鎮天氣預報",
+) -> str:
+    """Return the dataset endpoint code serving a city or district.
+
+    Raises:
+        KeyError: If the city or forecast type is unknown.
+        ValueError: If the district does not belong to the city.
+
+    """
+    index = get_location_index(forecast_type)
+    if district is not None:
+        if not index.has_district(city, district):
+            raise ValueError(f"Invalid district {district} for city {city}")
+        return index.endpoint(city, forecast_duration)
+
+    return index.endpoint(COUNTRY, forecast_duration)
+
 
 class CWAAPIClient:
-    """API Client for Central Weather Administration."""
+    """API Client for Central Weather Administration.
+
+    When an aiohttp session is given, requests are made natively on the event
+    loop; otherwise the blocking requests backend is used as a fallback.
 
-    def __init__(self, api_key: str) -> None:
-        """Initialize the API client."""
+    Identical requests in flight at the same time share one response, every
+    request waits for the rate limiter of its API key, and transient errors
+    (connection errors, timeouts, 429 and 5xx) are retried with backoff.
+
+    With a process pool, large forecast bodies are decoded and aligned in a
+    worker process instead of on the event loop.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        session: aiohttp.ClientSession | None = None,
+        base_url: str = API_BASE_URL,
+        process_pool: Executor | None = None,
+    ) -> None:
+        """Initialize the API client.
+
+        base_url can point at a local stand-in of the CWA API for load testing.
+        """
         assert isinstance(api_key, str), "API key is required"
         self._api_key = api_key
-        self.base_url = API_BASE_URL
-        self.api_response_data: dict[str, Any] | None = None
+        self.base_url = base_url.rstrip("/")
         self.last_update_time: datetime | None = None
-        self._session = requests.Session()
-
-        # 設置TWCA憑證路徑
-        cert_path = Path(__file__).parent / "opendata-cwa-gov-tw.pem"
-        if cert_path.exists():
-            self._session.verify = str(cert_path)
-        else:
-            _LOGGER.warning("TWCA certificate not found at %s, using system default", cert_path)
+        self._aiohttp_session = session
+        self._session: requests.Session | None = None
+        self._in_flight: dict[str, asyncio.Task[dict[str, Any] | None]] = {}
+        self._rate_limiter = _get_rate_limiter(api_key)
+        self.process_pool = process_pool
+        # 每個URL只保留最近一次的回應，位置清單改變時取代
+        self._responses: dict[str, _CachedResponse] = {}
+        # 最近一次請求各階段的耗時(毫秒)與大小
+        self.last_fetch: dict[str, float] = {}
+        self.stats: dict[str, int] = {
+            "requests": 0,
+            "coalesced": 0,
+            "rate_limited": 0,
+            "rate_limit_wait_ms": 0,
+            "retries": 0,
+            "retries_exhausted": 0,
+            "offloaded": 0,
+            "not_modified": 0,
+            "unchanged": 0,
+            "bytes_received": 0,
+            "bytes_decoded": 0,
+            "bytes_saved_not_modified": 0,
+            "bytes_saved_compression": 0,
+        }
+
+        if session is None:
+            self._session = requests.Session()
+
+            # 設置TWCA憑證路徑
+            if CERT_PATH.exists():
+                self._session.verify = str(CERT_PATH)
+            else:
+                _LOGGER.warning("TWCA certificate not found at %s, using system default", CERT_PATH)
 
     def __enter__(self) -> "CWAAPIClient":
         """Enter context manager."""
@@ -69,63 +259,333 @@ class CWAAPIClient:
 
         """
         try:
-            # 取得API endpoint
             try:
-                if district is not None:
-                    location_data = API_LOCATION_MAPPING[forecast_type]["location"][
-                        city
-                    ]
-                    endpoint = f"{location_data[forecast_duration]}"
-
-                    if district not in location_data["district"]:
-                        raise ValueError(f"Invalid district {district} for city {city}")
-                else:
-                    endpoint = API_LOCATION_MAPPING[forecast_type]["location"]["臺灣"][
-                        forecast_duration
-                    ]
-
+                endpoint = resolve_endpoint(
+                    city, district, forecast_duration, forecast_type
+                )
             except KeyError:
                 _LOGGER.error("Invalid city: %s", city)
                 return None
 
-            url = f"{self.base_url}/{API_LOCATION_MAPPING[forecast_type]['id']}-{endpoint}"
+            return await self.fetch_dataset(
+                forecast_type, endpoint, [district if district else city]
+            )
 
-            params = {
-                "Authorization": self._api_key,
-                "LocationName": district if district else city,
-            }
+        except Exception as err:
+            _LOGGER.error("Unexpected error: %s", err)
+            return None
 
-            try:
-                response = await asyncio.to_thread(
-                    self._session.get, url, params=params
-                )
-                response.raise_for_status()
+    async def fetch_dataset(
+        self,
+        forecast_type: str,
+        endpoint: str,
+        location_names: list[str] | None = None,
+    ) -> dict[str, Any] | None:
+        """Fetch one dataset for several locations in a single request.
+
+        Args:
+            forecast_type (str): The type of weather forecast, e.g. "鄉鎮天氣預報".
+            endpoint (str): The endpoint code of the dataset, e.g. "061".
+            location_names (list[str] | None): The locations to include. If not provided, the whole dataset is fetched.
+
+        Returns:
+            dict[str, Any] | None: The API response, or `None` if there is an error.
+
+        """
+        url = f"{self.base_url}/{get_location_index(forecast_type).dataset_id}-{endpoint}"
 
-                data = response.json()
-                if data.get("success") != "true":
-                    _LOGGER.error("API request failed: %s", data.get("message"))
-                    return None
+        params = {"Authorization": self._api_key}
+        if location_names:
+            params["LocationName"] = ",".join(location_names)
+        return await self._get(url, params)
 
-                self.last_update_time = datetime.now(tz=timezone(timedelta(hours=8)))
-                self.api_response_data = data
-                return data
+    async def fetch_observation(
+        self, dataset_id: str, station_ids: list[str] | None = None
+    ) -> dict[str, Any] | None:
+        """Fetch the latest readings of several weather stations in a single request.
+
+        Args:
+            dataset_id (str): The observation dataset, e.g. "O-A0001-001".
+            station_ids (list[str] | None): The stations to include. If not provided, every station is fetched.
 
-            except requests.RequestException as err:
-                _LOGGER.error("Error accessing API: %s", err)
+        Returns:
+            dict[str, Any] | None: The API response, or `None` if there is an error.
+
+        """
+        params = {"Authorization": self._api_key}
+        if station_ids:
+            params["StationId"] = ",".join(station_ids)
+        return await self._get(f"{self.base_url}/{dataset_id}", params)
+
+    async def _get(self, url: str, params: dict[str, str]) -> dict[str, Any] | None:
+        """Fetch a response, sharing identical requests that are in flight."""
+        # 相同的請求正在進行中時，等待同一個結果而不重複發送
+        key = self._request_key(url, params)
+        if (task := self._in_flight.get(key)) is None:
+            task = asyncio.create_task(self._fetch_dataset(url, params))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def _fetch_dataset(
+        self, url: str, params: dict[str, str]
+    ) -> dict[str, Any] | None:
+        """Fetch and validate a dataset response, logging any error."""
+        start = time.perf_counter()
+        try:
+            data = await self._fetch(url, params)
+
+            if data.get("success") != "true":
+                _LOGGER.error("API request failed: %s", data.get("message"))
                 return None
 
+            self.last_update_time = datetime.now(tz=timezone(timedelta(hours=8)))
+            return data
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, _RetryableStatusError) as err:
+            _LOGGER.error("Error accessing API: %s", err)
+            return None
+        except requests.RequestException as err:
+            _LOGGER.error("Error accessing API: %s", err)
+            return None
         except Exception as err:
             _LOGGER.error("Unexpected error: %s", err)
             return None
+        finally:
+            self.last_fetch["fetch_ms"] = (time.perf_counter() - start) * 1000
+
+    @property
+    def api_key(self) -> str:
+        """Return the API key the requests are made with."""
+        return self._api_key
+
+    @property
+    def cache_hit_ratio(self) -> float | None:
+        """Return the share of responses served without decoding a new body.
+
+        Coalesced requests, 304 responses and bodies identical to the
+        previous one all count as hits.
+        """
+        stats = self.stats
+        total = stats["requests"] + stats["coalesced"]
+        if not total:
+            return None
+        hits = stats["coalesced"] + stats["not_modified"] + stats["unchanged"]
+        return hits / total
+
+    async def _fetch(self, url: str, params: dict[str, str]) -> dict[str, Any]:
+        """Fetch a response, reusing the decoded body when it has not changed.
+
+        Requests ask for gzip and carry the ETag/Last-Modified validators of the
+        previous response. A 304, or a body with the same content hash as last
+        time, returns the previously decoded data object without decoding it
+        again, so callers can skip re-parsing by checking identity.
+
+        Only the last response of each URL is kept: a request for another set
+        of locations is sent without validators and replaces it.
+        """
+        key = self._request_key(url, params)
+        if (cached := self._responses.get(url)) is not None and cached.key != key:
+            cached = None
+
+        headers = {"Accept-Encoding": "gzip"}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        status, raw, response_headers, wire_size = await self._send(url, params, headers)
+
+        self.stats["requests"] += 1
+        self.last_fetch.update(
+            payload_bytes=len(raw), wire_bytes=wire_size, decode_ms=0, worker_ms=0
+        )
+        if status == 304 and cached is not None:
+            self.stats["not_modified"] += 1
+            self.stats["bytes_saved_not_modified"] += cached.size
+            return cached.data
+
+        self.stats["bytes_received"] += wire_size
+        self.stats["bytes_decoded"] += len(raw)
+        self.stats["bytes_saved_compression"] += max(len(raw) - wire_size, 0)
+
+        digest = hashlib.sha256(raw).digest()
+        if cached is not None and cached.digest == digest:
+            # 資料未更新，沿用上次解析的結果
+            self.stats["unchanged"] += 1
+            return cached.data
+
+        start = time.perf_counter()
+        tables = None
+        if self.process_pool is not None and len(raw) >= PROCESS_POOL_MIN_BYTES:
+            data, tables = await self._decode_in_worker(raw, params.get("LocationName"))
+        else:
+            data = json.loads(raw)
+        self.last_fetch["decode_ms"] = (time.perf_counter() - start) * 1000
+        self._responses[url] = _CachedResponse(
+            key=key,
+            digest=digest,
+            etag=response_headers.get("ETag"),
+            last_modified=response_headers.get("Last-Modified"),
+            size=len(raw),
+            data=data,
+            tables=tables,
+        )
+        return data
+
+    def tables_for(self, data: dict[str, Any]) -> dict[str, ForecastTable]:
+        """Return the tables aligned in a worker process along with a response."""
+        for cached in self._responses.values():
+            if cached.data is data:
+                return cached.tables or {}
+        return {}
+
+    async def _decode_in_worker(
+        self, raw: bytes, location_name: str | None
+    ) -> tuple[dict[str, Any], dict[str, ForecastTable] | None]:
+        """Decode and align a body in the process pool, off the event loop.
+
+        decode_ms is the time waited here, worker_ms the time the worker spent.
+        Falls back to decoding in-process if the pool has stopped working or
+        has been shut down since the request started.
+        """
+        location_names = frozenset(location_name.split(",")) if location_name else None
+        pool = self.process_pool
+        try:
+            data, tables, worker_ms = await asyncio.get_running_loop().run_in_executor(
+                pool, parse_response, raw, location_names
+            )
+        except BrokenExecutor as err:
+            # 工作程序異常結束後無法再使用，之後改回在主程序解析
+            _LOGGER.warning("Worker processes stopped, decoding in-process: %s", err)
+            if self.process_pool is pool:
+                self.process_pool = None
+            return json.loads(raw), None
+        except RuntimeError as err:
+            # 已不再使用的工作程序被關閉，這次改在主程序解析
+            _LOGGER.debug("Process pool shut down, decoding in-process: %s", err)
+            return json.loads(raw), None
+        self.stats["offloaded"] += 1
+        self.last_fetch["worker_ms"] = worker_ms
+        return data, tables
+
+    @staticmethod
+    def _request_key(url: str, params: dict[str, str]) -> str:
+        """Return the key identifying a request for caching and coalescing.
+
+        Every query parameter except the API key is part of the key, so
+        requests for different locations or stations never share a response.
+        """
+        query = "&".join(
+            f"{name}={value}"
+            for name, value in sorted(params.items())
+            if name != "Authorization"
+        )
+        return f"{url}?{query}"
+
+    async def _send(
+        self, url: str, params: dict[str, str], headers: dict[str, str]
+    ) -> tuple[int, bytes, dict[str, str], int]:
+        """Send a rate limited request, retrying transient errors with backoff."""
+        attempt = 0
+        while True:
+            waited = await self._rate_limiter.acquire()
+            if waited:
+                self.stats["rate_limited"] += 1
+                self.stats["rate_limit_wait_ms"] += round(waited * 1000)
+
+            try:
+                if self._aiohttp_session is not None:
+                    return await self._request_aiohttp(url, params, headers)
+                return await self._request_requests(url, params, headers)
+            except _TRANSIENT_ERRORS as err:
+                retry_after = getattr(err, "retry_after", None) or 0
+                # 伺服器要求等待太久時放棄，交由fetcher的排程稍後重試
+                if attempt >= API_MAX_RETRIES or retry_after > API_RETRY_MAX_DELAY:
+                    self.stats["retries_exhausted"] += 1
+                    raise
+                delay = max(
+                    jittered_backoff(attempt, API_RETRY_BASE_DELAY, API_RETRY_MAX_DELAY),
+                    retry_after,
+                )
+                attempt += 1
+                self.stats["retries"] += 1
+                _LOGGER.debug(
+                    "Retrying %s in %.1f seconds (attempt %d) after error: %s",
+                    url,
+                    delay,
+                    attempt,
+                    err,
+                )
+                await asyncio.sleep(delay)
+
+    async def _request_aiohttp(
+        self, url: str, params: dict[str, str], headers: dict[str, str]
+    ) -> tuple[int, bytes, dict[str, str], int]:
+        """Send a request with the shared aiohttp session.
+
+        The pinned certificate is set on the connector of the session.
+        """
+        start = time.perf_counter()
+        async with self._aiohttp_session.get(
+            url,
+            params=params,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=API_TIMEOUT),
+        ) as response:
+            # 收到回應標頭前的時間包含DNS、連線、TLS與伺服器處理
+            connected = time.perf_counter()
+            if response.status in RETRY_STATUSES:
+                raise _RetryableStatusError(
+                    response.status, _parse_retry_after(response.headers)
+                )
+            response.raise_for_status()
+            raw = await response.read()
+            self.last_fetch.update(
+                connect_ms=(connected - start) * 1000,
+                transfer_ms=(time.perf_counter() - connected) * 1000,
+            )
+            wire_size = response.content_length or len(raw)
+            return response.status, raw, dict(response.headers), wire_size
+
+    async def _request_requests(
+        self, url: str, params: dict[str, str], headers: dict[str, str]
+    ) -> tuple[int, bytes, dict[str, str], int]:
+        """Send a request with the blocking requests backend."""
+        start = time.perf_counter()
+        response = await asyncio.to_thread(
+            self._session.get, url, params=params, headers=headers, timeout=API_TIMEOUT
+        )
+        if response.status_code in RETRY_STATUSES:
+            raise _RetryableStatusError(
+                response.status_code, _parse_retry_after(response.headers)
+            )
+        response.raise_for_status()
+        raw = response.content
+        # requests的elapsed為收到回應標頭前的時間
+        connect_ms = response.elapsed.total_seconds() * 1000
+        self.last_fetch.update(
+            connect_ms=connect_ms,
+            transfer_ms=max((time.perf_counter() - start) * 1000 - connect_ms, 0),
+        )
+        wire_size = int(response.headers.get("Content-Length") or len(raw))
+        return response.status_code, raw, dict(response.headers), wire_size
 
     def close(self) -> None:
-        """Close the session."""
-        self._session.close()
+        """Close the session.
+
+        The aiohttp session is shared by the integration and is left open.
+        """
+        if self._session is not None:
+            self._session.close()
 
 
 if __name__ == "__main__":
     # 快速測試CWAAPIClient
-    # 如要測試請註解掉第12行的相對導入，並取消註解下面的測試程式碼
+    # 如要測試請註解掉第18行起的相對導入，並取消註解下面的測試程式碼
     # api_key = "your-api-key"  # 請替換為您的實際API金鑰
 
     # # API 相關資訊
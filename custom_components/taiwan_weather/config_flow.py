@@ -8,11 +8,24 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.const import CONF_API_KEY, CONF_NAME
+from homeassistant.const import CONF_API_KEY, CONF_NAME, CONF_URL
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-
-from .api import CWAAPIClient
-from .const import API_LOCATION_MAPPING, DOMAIN
+from homeassistant.helpers import config_validation as cv
+
+from .api import CWAAPIClient, resolve_endpoint
+from .const import (
+    API_BASE_URL,
+    CONF_DISTRICTS,
+    CONF_MAX_STALE_AGE,
+    CONF_OBSERVATION,
+    CONF_PROCESS_POOL,
+    DEFAULT_MAX_STALE_AGE,
+    DOMAIN,
+    RESTORE_MAX_AGE,
+)
+from .hub import async_get_session
+from .locations import get_location_index, normalize_name
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,25 +37,46 @@ class CWAWeatherConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
     MINOR_VERSION = 0
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._batch_input: dict[str, Any] = {}
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> CWAWeatherOptionsFlow:
+        """Return the options flow."""
+        return CWAWeatherOptionsFlow(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle a flow initiated by the user."""
+        return self.async_show_menu(step_id="user", menu_options=["district", "batch"])
+
+    async def async_step_district(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Set up a single district or county."""
         errors = {}
 
         if user_input is not None:
             # 檢查API金鑰和位置是否有效
-            api = CWAAPIClient(user_input[CONF_API_KEY])
+            api = CWAAPIClient(
+                user_input[CONF_API_KEY],
+                await async_get_session(self.hass),
+                user_input.get(CONF_URL) or API_BASE_URL,
+            )
             try:
                 # 如果district 資料中含有"台" 自動替換為"臺"
-                if "台" in user_input["district"]:
-                    user_input["district"] = user_input["district"].replace("台", "臺")
+                user_input["district"] = normalize_name(user_input["district"])
 
                 # 取得天氣預報資料
                 data = await api.get_weather(
                     user_input["city"],
                     user_input["district"],
-                    user_input.get("forecast_duration_type", "three_days"),
+                    "three_days",
                 )
                 api.close()
 
@@ -66,26 +100,138 @@ class CWAWeatherConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 api.close()
 
         # 取得所有縣市
-        cities = list(API_LOCATION_MAPPING["鄉鎮天氣預報"]["location"].keys())
+        cities = list(get_location_index().cities)
         # 如果已選擇縣市，取得其鄉鎮區列表
         districts = []
-        # 因為weekly 資料格式與 three_days 稍微不一樣 所以暫時先不開放選擇
-        # forcast_duration_type = list(API_LOCATION_MAPPING["鄉鎮天氣預報"]["forecast_duration_type"].keys())
+        # 三日預報提供目前天氣與逐時預報，一週預報固定用於每日預報，不需另外選擇
 
         # 建立設定表單
+        fields = {
+            vol.Required(CONF_API_KEY): str,
+            vol.Required("city"): vol.In(cities),
+            vol.Required(
+                "district", default=districts[0] if districts else ""
+            ): vol.In(districts) if districts else str,
+            vol.Optional(CONF_NAME): str,
+        }
+        if self.show_advanced_options:
+            # 進階選項：可指向本地模擬伺服器進行壓力測試
+            fields[vol.Optional(CONF_URL, default=API_BASE_URL)] = str
+        schema = vol.Schema(fields)
+
+        return self.async_show_form(
+            step_id="district",
+            data_schema=schema,
+            errors=errors,
+        )
+
+    async def async_step_batch(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Select the county of a batch entry."""
+        if user_input is not None:
+            self._batch_input = user_input
+            return await self.async_step_batch_districts()
+
+        cities = list(get_location_index().cities)
+        fields = {
+            vol.Required(CONF_API_KEY): str,
+            vol.Required("city"): vol.In(cities),
+        }
+        if self.show_advanced_options:
+            fields[vol.Optional(CONF_URL, default=API_BASE_URL)] = str
+
+        return self.async_show_form(step_id="batch", data_schema=vol.Schema(fields))
+
+    async def async_step_batch_districts(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Select several districts of the county and check them in one request."""
+        errors = {}
+        city = self._batch_input["city"]
+        districts = list(get_location_index().districts[city])
+
+        if user_input is not None:
+            selected = [district for district in districts if district in user_input[CONF_DISTRICTS]]
+            if not selected:
+                errors[CONF_DISTRICTS] = "no_districts"
+            else:
+                api = CWAAPIClient(
+                    self._batch_input[CONF_API_KEY],
+                    await async_get_session(self.hass),
+                    self._batch_input.get(CONF_URL) or API_BASE_URL,
+                )
+                try:
+                    # 所有鄉鎮市區位於同一資料集，一次請求即可確認
+                    data = await api.fetch_dataset(
+                        "鄉鎮天氣預報", resolve_endpoint(city, selected[0]), selected
+                    )
+                    if data:
+                        await self.async_set_unique_id(f"{city}_{','.join(selected)}")
+                        self._abort_if_unique_id_configured()
+
+                        return self.async_create_entry(
+                            title=user_input.get(CONF_NAME) or f"{city} ({len(selected)})",
+                            data={
+                                **self._batch_input,
+                                "district": "",
+                                CONF_DISTRICTS: selected,
+                            },
+                        )
+
+                    errors["base"] = "cannot_connect"
+
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Unexpected exception")
+                    errors["base"] = "unknown"
+                finally:
+                    api.close()
+
         schema = vol.Schema(
             {
-                vol.Required(CONF_API_KEY): str,
-                vol.Required("city"): vol.In(cities),
-                vol.Required(
-                    "district", default=districts[0] if districts else ""
-                ): vol.In(districts) if districts else str,
+                vol.Required(CONF_DISTRICTS): cv.multi_select(districts),
                 vol.Optional(CONF_NAME): str,
             }
         )
 
         return self.async_show_form(
-            step_id="user",
+            step_id="batch_districts",
             data_schema=schema,
             errors=errors,
+            description_placeholders={"city": city},
+        )
+
+
+class CWAWeatherOptionsFlow(config_entries.OptionsFlow):
+    """Handle the options of a Taiwan Weather entry."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Set how current conditions are served."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_MAX_STALE_AGE,
+                    default=self._entry.options.get(
+                        CONF_MAX_STALE_AGE, DEFAULT_MAX_STALE_AGE
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=RESTORE_MAX_AGE)),
+                vol.Required(
+                    CONF_OBSERVATION,
+                    default=self._entry.options.get(CONF_OBSERVATION, False),
+                ): bool,
+                vol.Required(
+                    CONF_PROCESS_POOL,
+                    default=self._entry.options.get(CONF_PROCESS_POOL, False),
+                ): bool,
+            }
         )
+        return self.async_show_form(step_id="init", data_schema=schema)
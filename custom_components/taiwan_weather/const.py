@@ -18,11 +18,58 @@ PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.WEATHER]
 
 # 預設值和更新週期
 DEFAULT_NAME = "Taiwan Weather"
-UPDATE_INTERVAL = 60  # 分鐘
+CONF_DISTRICTS = "districts"  # 批次設定中選擇的多個鄉鎮市區
+CONF_MAX_STALE_AGE = "max_stale_age"
+DEFAULT_MAX_STALE_AGE = 24  # 小時，API無法使用時沿用上次資料的時間上限
+CONF_OBSERVATION = "observation"  # 以最近氣象站的觀測值作為目前天氣
+CONF_PROCESS_POOL = "process_pool"  # 大型回應交由工作程序解析與對齊
+FETCH_REUSE_WINDOW = 5  # 分鐘，同一資料集在此時間內的請求共用結果
+
+# 氣象署預期發布資料的時間，於發布後稍待片刻再取得資料
+PUBLICATION_HOURS = {
+    "three_days": (0, 6, 12, 18),
+    "weekly": (6, 18),  # 一週預報每日更新兩次，使用較慢的排程
+}
+PUBLICATION_DELAY = 10  # 分鐘
+RETRY_BASE_DELAY = 5  # 分鐘，尚未取得新資料時的重試間隔
+RETRY_MAX_DELAY = 60  # 分鐘
+
+FORECAST_SLOT = 60  # 分鐘，逐時預報的時間間隔，目前天氣在兩個預報時間的中點切換
+
+# 氣象站觀測資料(局屬氣象站優先於自動氣象站)，每10分鐘更新
+OBSERVATION_DATASETS = ("O-A0003-001", "O-A0001-001")
+OBSERVATION_INTERVAL = 10  # 分鐘
+OBSERVATION_DELAY = 3  # 分鐘
+OBSERVATION_MAX_DISTANCE = 10  # 公里，超過此距離的氣象站不採用
+OBSERVATION_MAX_AGE = 60  # 分鐘，較舊的觀測值改用預報值
+
+# 本地快取，重新啟動時先使用上次成功取得的資料
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10  # 秒
+RESTORE_MAX_AGE = 72  # 小時，三日預報涵蓋的時間，更舊的資料已無用
+
+# hass.data[DOMAIN] 中的共用資料鍵值
+DATA_FETCHERS = "fetchers"
+DATA_SESSION = "session"
+DATA_CLOCK = "clock"
+DATA_OBSERVATION_FETCHERS = "observation_fetchers"
+DATA_SESSION_UNSUB = "session_unsub"
+DATA_PROCESS_POOL = "process_pool"
+DATA_PROCESS_POOL_UNSUB = "process_pool_unsub"
 
 
 # API 相關資訊
 API_BASE_URL  = "https://opendata.cwa.gov.tw/api/v1/rest/datastore"
+API_TIMEOUT = 30  # 秒
+API_CONNECTION_LIMIT = 4  # 整個Home Assistant共用的連線數上限
+API_KEEPALIVE_TIMEOUT = 60  # 秒，閒置連線保留時間，避免重複TLS交握
+API_RATE_LIMIT = 1.0  # 每個API金鑰每秒可發送的請求數
+API_RATE_BURST = 5  # 可累積的請求數，供同時發布的資料集一起更新
+API_MAX_RETRIES = 3  # 暫時性錯誤的重試次數
+API_RETRY_BASE_DELAY = 2  # 秒
+API_RETRY_MAX_DELAY = 30  # 秒
+PROCESS_POOL_MIN_BYTES = 512 * 1024  # 啟用工作程序時，超過此大小的回應才交給工作程序
+PROCESS_POOL_MAX_WORKERS = 2  # 整個Home Assistant共用的工作程序數上限
 
 API_LOCATION_MAPPING = {
     "鄉鎮天氣預報": {
@@ -70,7 +117,7 @@ API_LOCATION_MAPPING = {
             "嘉義縣": {
                 "three_days": "029", # F-D0047-029
                 "weekly": "031", # F-D0047-031
-                "district": ["大林鎮", "溪口鄉", "阿里山鄉", "梅山鄉", "新港鄉", "民雄鄉", "六腳鄉", "竹崎", "鄉", "東石鄉", "太保市", "番路鄉", "朴子市", "水上鄉", "中埔鄉", "布袋鎮", "鹿草鄉", "義竹鄉", "大埔鄉"]
+                "district": ["大林鎮", "溪口鄉", "阿里山鄉", "梅山鄉", "新港鄉", "民雄鄉", "六腳鄉", "竹崎鄉", "東石鄉", "太保市", "番路鄉", "朴子市", "水上鄉", "中埔鄉", "布袋鎮", "鹿草鄉", "義竹鄉", "大埔鄉"]
             },
             "屏東縣": {
                 "three_days": "033", # F-D0047-033
@@ -1,17 +1,41 @@
 """Data update coordinator for Taiwan Weather."""
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 import logging
+import time
 from typing import Any
 
+from homeassistant.components.weather import ATTR_CONDITION_EXCEPTIONAL, Forecast
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_API_KEY
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_API_KEY, CONF_URL
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .api import CWAAPIClient
-from .const import DOMAIN, UPDATE_INTERVAL
-from .cwa_data_parser import CWADataParser
+from .api import resolve_endpoint
+from .const import (
+    API_BASE_URL,
+    CONDITION_MAP,
+    CONF_DISTRICTS,
+    CONF_MAX_STALE_AGE,
+    CONF_OBSERVATION,
+    CONF_PROCESS_POOL,
+    DEFAULT_MAX_STALE_AGE,
+    DOMAIN,
+    OBSERVATION_INTERVAL,
+    OBSERVATION_MAX_AGE,
+)
+from .cwa_data_parser import CWADataParser, CWAWeeklyDataParser, ForecastTable
+from .hub import (
+    async_get_clock,
+    async_get_fetcher,
+    async_get_observation_fetcher,
+    async_get_process_pool,
+    async_release_fetcher,
+    async_release_observation_fetcher,
+    async_release_process_pool,
+)
+from .models import Observation, WeatherSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,68 +44,476 @@ class CWAAPIClientError(Exception):
     """Exception class for CWA API errors."""
 
 
-class CWADataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
-    """Class to manage fetching CWA Weather data."""
+class LocationForecast:
+    """Parsed three-day and weekly forecasts of one location."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize the location."""
+        self.name = name
+        self.parser = CWADataParser()
+        self.weekly_parser = CWAWeeklyDataParser()
+        self.api_response_data: dict[str, Any] | None = None
+        self.weekly_api_response_data: dict[str, Any] | None = None
+        self.last_update_time: datetime | None = None
+        self.observation: Observation | None = None
+        self._hourly_forecast: tuple[Forecast, ...] | None = None
+        self._daily_forecast: tuple[Forecast, ...] | None = None
+        self._twice_daily_forecast: tuple[Forecast, ...] | None = None
+
+    @property
+    def coordinates(self) -> tuple[float, float] | None:
+        """Return the latitude and longitude given in the forecast data."""
+        try:
+            location = self.api_response_data["records"]["Locations"][0]["Location"][0]
+            return float(location["Latitude"]), float(location["Longitude"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+    def load_weather_data(
+        self,
+        data: dict[str, Any],
+        last_update_time: datetime | None,
+        table: ForecastTable | None = None,
+    ) -> None:
+        """Load a three-day response and build the hourly forecast once."""
+        self.api_response_data = data
+        self.last_update_time = last_update_time
+        self.parser.load_api_response(data, table)
+        # 逐時預報只取決於資料本身，每份資料建立一次，整點更新時沿用
+        try:
+            self._hourly_forecast = tuple(self.parser.parse_weather_data())
+        except (KeyError, IndexError, ValueError):
+            self._hourly_forecast = None
+
+    def load_weekly_data(
+        self, data: dict[str, Any], table: ForecastTable | None = None
+    ) -> None:
+        """Load a weekly response and build the daily forecasts once."""
+        self.weekly_api_response_data = data
+        self.weekly_parser.load_api_response(data, table)
+        try:
+            self._twice_daily_forecast = tuple(self.weekly_parser.parse_twice_daily_forecast())
+            self._daily_forecast = tuple(self.weekly_parser.parse_daily_forecast())
+        except (KeyError, IndexError, ValueError) as err:
+            _LOGGER.warning("Failed to parse weekly forecast of %s: %s", self.name, err)
+            self._twice_daily_forecast = self._daily_forecast = None
+
+    def build_snapshot(
+        self, slot: datetime, now: datetime, stale: bool = False
+    ) -> WeatherSnapshot:
+        """Compute current conditions for a slot and the forecast from the parsed data."""
+        # 每個時段只找一次最接近的預報時間，各欄位直接以索引讀取
+        try:
+            index = self.parser.get_index(slot.timestamp())
+        except (KeyError, IndexError, ValueError):
+            # 資料無法對齊(例如缺少溫度)時沒有目前天氣
+            index = None
+        table = self.parser.table
+
+        def current(field):
+            return table.get(field, index) if index is not None else None
+
+        # 有近期的氣象站觀測值時優先使用，缺值的項目改用預報值
+        observation = self.observation
+        if observation is not None and now - observation.time > timedelta(
+            minutes=OBSERVATION_MAX_AGE
+        ):
+            observation = None
+
+        def observed(field, forecast_field):
+            if observation is not None and (value := getattr(observation, field)) is not None:
+                return value
+            return current(forecast_field)
+
+        weather_code = current("WeatherCode")
+        humidity = observed("humidity", "RelativeHumidity")
+        precipitation = current("ProbabilityOfPrecipitation")
+        beaufort_scale = current("BeaufortScale")
+        return WeatherSnapshot(
+            time=slot.strftime("%Y-%m-%dT%H:%M:00+08:00"),
+            condition=(
+                CONDITION_MAP.get(weather_code, ATTR_CONDITION_EXCEPTIONAL)
+                if weather_code is not None
+                else None
+            ),
+            native_temperature=observed("native_temperature", "Temperature"),
+            native_apparent_temperature=current("ApparentTemperature"),
+            humidity=int(humidity) if humidity is not None else None,
+            native_dew_point=current("DewPoint"),
+            wind_bearing=observed("wind_bearing", "WindDirection"),
+            native_wind_speed=observed("native_wind_speed", "WindSpeed"),
+            beaufort_scale=int(beaufort_scale) if beaufort_scale is not None else None,
+            precipitation_probability=int(precipitation) if precipitation is not None else None,
+            comfort_index=current("ComfortIndex"),
+            comfort_index_description=current("ComfortIndexDescription"),
+            weather_description=current("WeatherDescription"),
+            hourly_forecast=self._hourly_forecast,
+            daily_forecast=self._daily_forecast,
+            twice_daily_forecast=self._twice_daily_forecast,
+            last_update_time=self.last_update_time,
+            stale=stale,
+            observation_station=observation.station_name if observation else None,
+            observation_time=observation.time if observation else None,
+        )
+
+
+class CWADataUpdateCoordinator(DataUpdateCoordinator[dict[str, WeatherSnapshot] | None]):
+    """Class to manage fetching CWA Weather data.
+
+    A coordinator serves every location of a config entry: a single district
+    (or county), or several districts of one county for a batch entry. The
+    data is a snapshot per location name.
+    """
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize."""
-        self.api = CWAAPIClient(entry.data[CONF_API_KEY])
-        self.parser = CWADataParser(self.api)
         self.city = entry.data["city"]
-        self.district = (
-            entry.data["district"] if entry.data["district"] else None
-        )  # 如果district為空，則不傳遞district參數
+        if districts := entry.data.get(CONF_DISTRICTS):
+            # 批次設定：同一縣市的多個鄉鎮市區共用一次請求
+            self.is_batch = True
+            self.district = districts[0]
+            location_names = list(districts)
+        else:
+            self.is_batch = False
+            self.district = (
+                entry.data["district"] if entry.data["district"] else None
+            )  # 如果district為空，則不傳遞district參數
+            # 未指定district時，以縣市名稱查詢全臺資料集
+            location_names = [self.district if self.district else self.city]
+        self.locations = {name: LocationForecast(name) for name in location_names}
+        # API無法使用時繼續提供上次的資料，超過此時間才視為無法使用
+        self.max_stale_age = timedelta(
+            hours=entry.options.get(CONF_MAX_STALE_AGE, DEFAULT_MAX_STALE_AGE)
+        )
+        self._stale = False
+        # 最近一次更新、建立快照與更新實體的耗時(毫秒)
+        self.timings: dict[str, float] = {}
+        # 感測器寫入與因數值未變更而略過的狀態寫入次數
+        self.sensor_writes = {"written": 0, "skipped": 0}
+
+        # 三日預報提供目前天氣與逐時預報，一週預報提供每日預報
+        base_url = entry.data.get(CONF_URL) or API_BASE_URL
+        # 選用：大型回應交由工作程序解析與對齊，不佔用事件迴圈
+        process_pool = (
+            async_get_process_pool(hass)
+            if entry.options.get(CONF_PROCESS_POOL)
+            else None
+        )
+        self.fetcher = async_get_fetcher(
+            hass,
+            entry.data[CONF_API_KEY],
+            "鄉鎮天氣預報",
+            resolve_endpoint(self.city, self.district, "three_days"),
+            "three_days",
+            base_url,
+        )
+        self.weekly_fetcher = async_get_fetcher(
+            hass,
+            entry.data[CONF_API_KEY],
+            "鄉鎮天氣預報",
+            resolve_endpoint(self.city, self.district, "weekly"),
+            "weekly",
+            base_url,
+        )
+        # 由資料集的fetcher依照發布時間排程更新，coordinator本身不輪詢
+        self._unsub_fetcher = self.fetcher.subscribe(
+            self.locations, self._handle_fetcher_update, process_pool
+        )
+        self._unsub_weekly_fetcher = self.weekly_fetcher.subscribe(
+            self.locations, self._handle_weekly_fetcher_update, process_pool
+        )
+        # 選用：以最近氣象站的觀測值作為目前天氣，較快的排程獨立更新
+        self.observation_fetcher = (
+            async_get_observation_fetcher(hass, entry.data[CONF_API_KEY], base_url)
+            if entry.options.get(CONF_OBSERVATION)
+            else None
+        )
+        self.stations: dict[str, str] = {}
+        self._unsub_observation: CALLBACK_TYPE | None = None
 
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(minutes=UPDATE_INTERVAL),  # 每60分鐘更新一次
+            update_interval=None,
         )
 
+        # 目前天氣於預報時段切換時由共用的時鐘通知重新計算，不需要重新請求API
+        self.clock = async_get_clock(hass)
+        self._unsub_clock = self.clock.subscribe(self._async_handle_slot_change)
+
     async def _async_setup(self):
         """Set up the coordinator."""
+        # 一週預報不影響目前天氣，於背景載入以免拖慢啟動
+        self.config_entry.async_create_background_task(
+            self.hass,
+            self._async_setup_weekly(),
+            f"{DOMAIN} weekly {self.config_entry.title}",
+        )
+        if self.observation_fetcher is not None:
+            self.config_entry.async_create_background_task(
+                self.hass,
+                self._async_setup_observation(),
+                f"{DOMAIN} observation {self.config_entry.title}",
+            )
+
+        await self.fetcher.async_load()
+        restored = [
+            (location, data)
+            for location in self.locations.values()
+            if (data := self.fetcher.get_location(location.name))
+        ]
+        for location, data in restored:
+            location.load_weather_data(
+                data,
+                self.fetcher.last_update_time,
+                self.fetcher.get_table(location.name),
+            )
+        if len(restored) == len(self.locations):
+            # 先使用上次儲存的資料啟動，再於背景重新取得
+            self.config_entry.async_create_background_task(
+                self.hass,
+                self._async_revalidate(),
+                f"{DOMAIN} revalidate {self.config_entry.title}",
+            )
+            return
+
         try:
             await self.setup_weather_data()
         except CWAAPIClientError as err:
             _LOGGER.error("Failed to set up weather data: %s", err)
             return False
 
-    async def _async_update_data(self) -> dict[str, Any]:
+    async def _async_setup_weekly(self) -> None:
+        """Load the weekly forecast, restoring stored data first."""
+        await self.weekly_fetcher.async_load()
+        for location in self.locations.values():
+            if data := self.weekly_fetcher.get_location(location.name):
+                location.load_weekly_data(
+                    data, self.weekly_fetcher.get_table(location.name)
+                )
+        for location in self.locations.values():
+            # 第一次請求即包含所有位置，其餘位置直接使用同一份結果
+            if data := await self.weekly_fetcher.async_get_location(location.name):
+                location.load_weekly_data(
+                    data, self.weekly_fetcher.get_table(location.name)
+                )
+        if self.data is not None:
+            self.async_set_updated_data(self.build_snapshots())
+
+    async def _async_setup_observation(self) -> None:
+        """Subscribe every location to its nearest weather station.
+
+        The station is chosen from the coordinates in the forecast data, so
+        this waits for the forecast and retries while the index cannot be built.
+        """
+        while True:
+            coordinates = {
+                name: coordinates
+                for name, location in self.locations.items()
+                if (coordinates := location.coordinates) is not None
+            }
+            if coordinates:
+                stations = await self.observation_fetcher.async_nearest_stations(coordinates)
+                if stations is not None:
+                    break
+            elif self.has_weather_data:
+                _LOGGER.warning("No coordinates in the forecast data for observations")
+                return
+            await asyncio.sleep(OBSERVATION_INTERVAL * 60)
+
+        self.stations = stations
+        self._unsub_observation = self.observation_fetcher.subscribe(
+            set(stations.values()), self._handle_observation_update
+        )
+        self._handle_observation_update()
+
+    async def _async_revalidate(self) -> None:
+        """Replace restored data with a fresh response."""
+        try:
+            await self.setup_weather_data()
+        except CWAAPIClientError as err:
+            _LOGGER.warning("Failed to revalidate restored weather data: %s", err)
+            return
+        self.async_set_updated_data(self.build_snapshots())
+
+    async def _async_update_data(self) -> dict[str, WeatherSnapshot] | None:
         """Fetch data from API."""
+        start = time.perf_counter()
         try:
-            if self.should_poll() or self.api.api_response_data is None:
-                data = await self.setup_weather_data()  # 更新天氣資料
+            if not self.has_weather_data:
+                await self.setup_weather_data()  # 更新天氣資料
             else:
-                data = self.api.api_response_data  # 使用上次的資料，避免頻繁請求API
+                # 使用上次的資料，新資料由fetcher推送
                 _LOGGER.debug(
                     f"Time: {datetime.now(tz=timezone(timedelta(hours=8))).strftime('%Y-%m-%dT%H:%M:00+08:00')}, Using cached weather data"  # noqa: G004
                 )
 
-            return data  # noqa: TRY300
+            return self.build_snapshots()
 
         except Exception as err:
             _LOGGER.error("Error updating weather data: %s", err)
             raise
+        finally:
+            self.timings["update_ms"] = (time.perf_counter() - start) * 1000
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all listeners, timing the entity state writes."""
+        start = time.perf_counter()
+        super().async_update_listeners()
+        self.timings["listeners_ms"] = (time.perf_counter() - start) * 1000
+
+    def get_metrics(self) -> dict[str, float | None]:
+        """Return the latest timings and sizes of the refresh hot path."""
+        last_fetch = self.fetcher.api.last_fetch
+        # 批次設定時為所有位置的總和
+        align_ms = [
+            location.parser.timings["align_ms"]
+            for location in self.locations.values()
+            if "align_ms" in location.parser.timings
+        ]
+        forecast_ms = [
+            location.parser.timings["forecast_ms"]
+            for location in self.locations.values()
+            if "forecast_ms" in location.parser.timings
+        ]
+        return {
+            "fetch_ms": last_fetch.get("fetch_ms"),
+            "connect_ms": last_fetch.get("connect_ms"),
+            "transfer_ms": last_fetch.get("transfer_ms"),
+            "decode_ms": last_fetch.get("decode_ms"),
+            "worker_ms": last_fetch.get("worker_ms"),
+            "payload_bytes": last_fetch.get("payload_bytes"),
+            "wire_bytes": last_fetch.get("wire_bytes"),
+            "align_ms": sum(align_ms) if align_ms else None,
+            "forecast_ms": sum(forecast_ms) if forecast_ms else None,
+            "parse_ms": sum(align_ms) + sum(forecast_ms) if align_ms or forecast_ms else None,
+            "update_ms": self.timings.get("update_ms"),
+            "snapshot_ms": self.timings.get("snapshot_ms"),
+            "listeners_ms": self.timings.get("listeners_ms"),
+            "cache_hit_ratio": self.fetcher.api.cache_hit_ratio,
+            "sensor_writes": self.sensor_writes["written"],
+            "sensor_writes_skipped": self.sensor_writes["skipped"],
+        }
 
-    def should_poll(self) -> bool:
-        """Return True if polling should be enabled."""
+    @property
+    def has_weather_data(self) -> bool:
+        """Return True if any location has a three-day response."""
+        return any(location.api_response_data for location in self.locations.values())
+
+    @property
+    def is_stale(self) -> bool:
+        """Return True while the three-day dataset cannot be refreshed."""
+        return self.fetcher.consecutive_failures > 0
+
+    @callback
+    def _handle_fetcher_update(self) -> None:
+        """Load new data published by the shared fetcher."""
+        # 資料是否過時改變時也需要更新實體屬性
+        changed = self._stale != self.is_stale
+        for location in self.locations.values():
+            data = self.fetcher.get_location(location.name)
+            if data and data is not location.api_response_data:
+                location.load_weather_data(
+                    data,
+                    self.fetcher.last_update_time,
+                    self.fetcher.get_table(location.name),
+                )
+                changed = True
+            elif (
+                data
+                and self.fetcher.last_update_time is not None
+                and location.last_update_time != self.fetcher.last_update_time
+            ):
+                # 內容未變更(304或相同內容)的成功請求也表示資料仍是最新的
+                location.last_update_time = self.fetcher.last_update_time
+                changed = True
+        if changed and self.has_weather_data:
+            self.async_set_updated_data(self.build_snapshots())
+
+    @callback
+    def _handle_weekly_fetcher_update(self) -> None:
+        """Load a new weekly forecast published by the shared fetcher."""
+        changed = False
+        for location in self.locations.values():
+            data = self.weekly_fetcher.get_location(location.name)
+            if data and data is not location.weekly_api_response_data:
+                location.load_weekly_data(
+                    data, self.weekly_fetcher.get_table(location.name)
+                )
+                changed = True
+        if changed and self.data is not None:
+            self.async_set_updated_data(self.build_snapshots())
+
+    @callback
+    def _handle_observation_update(self) -> None:
+        """Use the latest observations of the nearest stations."""
+        changed = False
+        for name, station_id in self.stations.items():
+            observation = self.observation_fetcher.get_observation(station_id)
+            location = self.locations[name]
+            if observation is not location.observation:
+                location.observation = observation
+                changed = True
+        if changed and self.data is not None:
+            self.async_set_updated_data(self.build_snapshots())
+
+    @callback
+    def _async_handle_slot_change(self, slot: datetime) -> None:
+        """Rebuild the snapshots for the new forecast slot."""
+        if self.data is None:
+            return
+        self.data = self.build_snapshots()
+        self.async_update_listeners()
+
+    def build_snapshots(self) -> dict[str, WeatherSnapshot]:
+        """Compute the snapshot of every location."""
+        start = time.perf_counter()
         now = datetime.now(tz=timezone(timedelta(hours=8)))
-        return now.hour in [0, 6, 12, 18]
+        slot = self.clock.slot
+        self._stale = stale = self.is_stale
+        snapshots = {}
+        for name, location in self.locations.items():
+            if (
+                location.last_update_time is not None
+                and now - location.last_update_time > self.max_stale_age
+            ):
+                # 資料過舊，不再提供，實體顯示為無法使用
+                _LOGGER.debug("Data of %s is older than %s", name, self.max_stale_age)
+                continue
+            snapshots[name] = location.build_snapshot(slot, now, stale)
+        self.timings["snapshot_ms"] = (time.perf_counter() - start) * 1000
+        return snapshots
 
-    async def setup_weather_data(self) -> dict[str, Any] | None:
+    async def setup_weather_data(self) -> None:
         """Set up weather data."""
-        self.parser.clear_weather_element()
-        data = await self.api.get_weather(self.city, self.district)
+        for location in self.locations.values():
+            # 第一次請求即包含所有位置，其餘位置直接使用同一份結果
+            if data := await self.fetcher.async_get_location(location.name):
+                location.load_weather_data(
+                    data,
+                    self.fetcher.last_update_time,
+                    self.fetcher.get_table(location.name),
+                )
         self.check_weather_response()
-        return data
 
     def check_weather_response(self):
         """Check the weather response for errors."""
-        if not self.api.api_response_data:
+        if not self.has_weather_data:
             raise CWAAPIClientError("無法獲取天氣資料")
 
     async def async_shutdown(self):
         """Shutdown the coordinator."""
         await super().async_shutdown()
-        self.api.close()
+        self._unsub_clock()
+        self._unsub_fetcher()
+        self._unsub_weekly_fetcher()
+        async_release_fetcher(self.hass, self.fetcher)
+        async_release_fetcher(self.hass, self.weekly_fetcher)
+        # 剩下的設定都未啟用工作程序時即關閉
+        async_release_process_pool(self.hass)
+        if self.observation_fetcher is not None:
+            if self._unsub_observation is not None:
+                self._unsub_observation()
+            async_release_observation_fetcher(self.hass, self.observation_fetcher)
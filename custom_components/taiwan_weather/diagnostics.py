@@ -0,0 +1,52 @@
+"""Diagnostics support for Taiwan Weather."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_API_KEY
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import CWADataUpdateCoordinator
+
+TO_REDACT = {CONF_API_KEY}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: CWADataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": async_redact_data(entry.data, TO_REDACT),
+        "datasets": [
+            {
+                "forecast_type": fetcher.forecast_type,
+                "endpoint": fetcher.endpoint,
+                "forecast_duration": fetcher.forecast_duration,
+                "last_update_time": fetcher.last_update_time,
+                "issue_time": fetcher.issue_time,
+                "consecutive_failures": fetcher.consecutive_failures,
+                "transfer": dict(fetcher.api.stats),
+                "last_fetch": dict(fetcher.api.last_fetch),
+                "cache_hit_ratio": fetcher.api.cache_hit_ratio,
+            }
+            for fetcher in (coordinator.fetcher, coordinator.weekly_fetcher)
+        ],
+        "observation": (
+            {
+                "stations": coordinator.stations,
+                "indexed_stations": len(fetcher.index) if fetcher.index else None,
+                "last_update_time": fetcher.last_update_time,
+                "consecutive_failures": fetcher.consecutive_failures,
+                "transfer": dict(fetcher.api.stats),
+            }
+            if (fetcher := coordinator.observation_fetcher) is not None
+            else None
+        ),
+        "metrics": coordinator.get_metrics(),
+    }
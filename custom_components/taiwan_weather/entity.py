@@ -0,0 +1,72 @@
+"""Base entity for Taiwan Weather."""
+
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DEFAULT_NAME, DOMAIN, MANUFACTURER
+from .coordinator import CWADataUpdateCoordinator
+from .models import WeatherSnapshot
+
+
+class TaiwanWeatherEntity(CoordinatorEntity[CWADataUpdateCoordinator]):
+    """Base class of the entities of a Taiwan Weather config entry.
+
+    Entities of a batch entry belong to a device per district. A single
+    location entry, and entry-wide entities such as the diagnostic sensors,
+    use the device of the config entry.
+    """
+
+    def __init__(
+        self,
+        coordinator: CWADataUpdateCoordinator,
+        config_entry: ConfigEntry,
+        location_name: str | None,
+        key: str,
+    ) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._config = config_entry
+        self._location_name = location_name
+
+        entry_id = config_entry.entry_id
+        if location_name is not None and coordinator.is_batch:
+            self._attr_unique_id = f"{entry_id}_{location_name}_{key}"
+            self._attr_device_info = DeviceInfo(
+                entry_type=DeviceEntryType.SERVICE,
+                identifiers={(DOMAIN, f"{entry_id}_{location_name}")},
+                manufacturer=MANUFACTURER,
+                name=f"{DEFAULT_NAME} {location_name}",
+            )
+        else:
+            self._attr_unique_id = f"{entry_id}_{key}"
+            self._attr_device_info = DeviceInfo(
+                entry_type=DeviceEntryType.SERVICE,
+                identifiers={(DOMAIN, f"{entry_id}")},
+                manufacturer=MANUFACTURER,
+                name=DEFAULT_NAME,
+            )
+
+    @property
+    def available(self) -> bool:
+        """Return False once the location has no data recent enough to serve."""
+        if not super().available:
+            return False
+        return self._location_name is None or self.snapshot is not None
+
+    @property
+    def location_label(self) -> str | None:
+        """Return the location used in entity names."""
+        if self.coordinator.is_batch:
+            return self._location_name
+        return self._config.data.get("district")
+
+    @property
+    def snapshot(self) -> WeatherSnapshot | None:
+        """Return the snapshot of the entity's location."""
+        if not self.coordinator.data or self._location_name is None:
+            return None
+        return self.coordinator.data.get(self._location_name)
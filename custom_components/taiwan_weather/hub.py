@@ -0,0 +1,876 @@
+"""Shared per-dataset fetching for Taiwan Weather."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+import hashlib
+import logging
+import multiprocessing
+from typing import Any
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.storage import Store
+
+from .api import CWAAPIClient, async_get_ssl_context
+from .cwa_data_parser import ForecastTable
+from .const import (
+    API_BASE_URL,
+    API_CONNECTION_LIMIT,
+    API_KEEPALIVE_TIMEOUT,
+    DATA_CLOCK,
+    DATA_FETCHERS,
+    DATA_OBSERVATION_FETCHERS,
+    DATA_PROCESS_POOL,
+    DATA_PROCESS_POOL_UNSUB,
+    DATA_SESSION,
+    DATA_SESSION_UNSUB,
+    DOMAIN,
+    FETCH_REUSE_WINDOW,
+    FORECAST_SLOT,
+    OBSERVATION_DATASETS,
+    OBSERVATION_DELAY,
+    OBSERVATION_INTERVAL,
+    OBSERVATION_MAX_DISTANCE,
+    PROCESS_POOL_MAX_WORKERS,
+    PUBLICATION_DELAY,
+    PUBLICATION_HOURS,
+    RESTORE_MAX_AGE,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+from .locations import get_location_index
+from .models import Observation
+from .observation import StationIndex, parse_station
+from .scheduler import PublicationScheduler, extract_issue_time, next_interval
+
+_LOGGER = logging.getLogger(__name__)
+
+# 不同API金鑰各自使用fetcher，一個金鑰失效不影響其他設定，也各自受限流器控制
+FetcherKey = tuple[str, str, str, str, str]
+ObservationFetcherKey = tuple[str, str]
+
+
+def _call_listeners(listeners: Iterable[Callable[..., None]], *args: Any) -> None:
+    """Call every listener, so that one failing entry does not starve the others."""
+    for update_callback in list(listeners):
+        try:
+            update_callback(*args)
+        except Exception:
+            _LOGGER.exception("Error in %s listener %s", DOMAIN, update_callback)
+
+
+def _slice_location(data: dict[str, Any], location: dict[str, Any]) -> dict[str, Any]:
+    """Return a copy of the response that only contains one location."""
+    locations = data["records"]["Locations"][0]
+    return {
+        **data,
+        "records": {
+            **data["records"],
+            "Locations": [{**locations, "Location": [location]}],
+        },
+    }
+
+
+class CWADatasetFetcher:
+    """Fetch one CWA dataset on behalf of every subscribed location.
+
+    Every coordinator whose location lives in the same dataset shares one
+    fetcher, so a county with many districts costs a single request. The
+    fetcher refreshes itself just after each expected CWA publication and
+    retries with backoff until a newer issue time shows up, then notifies
+    its subscribers.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: CWAAPIClient,
+        forecast_type: str,
+        endpoint: str,
+        forecast_duration: str,
+        scheduler: PublicationScheduler,
+    ) -> None:
+        """Initialize the fetcher."""
+        self.hass = hass
+        self.api = api
+        self.forecast_type = forecast_type
+        self.endpoint = endpoint
+        self.forecast_duration = forecast_duration
+        self.scheduler = scheduler
+        self.last_update_time: datetime | None = None
+        self.issue_time: datetime | None = None
+        self._subscribers: dict[str, int] = {}
+        self._listeners: list[Callable[[], None]] = []
+        # 選擇以工作程序解析的訂閱者
+        self._process_pools: dict[Callable[[], None], ProcessPoolExecutor] = {}
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._retry_attempt = 0
+        # 啟動後第一次取得的資料也要確認是否為最新發布，否則等到下一次發布才會更新
+        self._first_fetch_checked = False
+        self._slices: dict[str, dict[str, Any]] = {}
+        # 工作程序已對齊的表格，與同一次取得的切片一起使用
+        self._tables: dict[str, ForecastTable] = {}
+        self._fetch_task: asyncio.Task[None] | None = None
+        self._fetching: frozenset[str] = frozenset()
+        self._load_task: asyncio.Task[None] | None = None
+        # 已還原但尚未被訂閱的位置，及其儲存的表格
+        self._restored: dict[str, dict[str, Any]] = {}
+        self._restored_tables: dict[str, dict[str, Any]] = {}
+        self._last_data: dict[str, Any] | None = None
+        # 連續失敗的請求數，成功後歸零
+        self.consecutive_failures = 0
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, self._store_key())
+
+    @property
+    def key(self) -> FetcherKey:
+        """Return the registry key of the fetcher."""
+        return (
+            self.forecast_type,
+            self.endpoint,
+            self.forecast_duration,
+            self.api.base_url,
+            self.api.api_key,
+        )
+
+    @property
+    def has_subscribers(self) -> bool:
+        """Return True if any location is still subscribed."""
+        return bool(self._subscribers)
+
+    def _store_key(self) -> str:
+        """Return the storage key of the fetcher.
+
+        The whole registry key is part of it, hashed so the API key is not
+        written into the file name, so fetchers of different API keys or
+        servers never restore each other's data.
+        """
+        digest = hashlib.sha256("\n".join(self.key).encode()).hexdigest()[:16]
+        dataset_id = get_location_index(self.forecast_type).dataset_id
+        return f"{DOMAIN}.{dataset_id}-{self.endpoint}.{digest}"
+
+    @callback
+    def subscribe(
+        self,
+        location_names: Iterable[str],
+        update_callback: Callable[[], None],
+        process_pool: ProcessPoolExecutor | None = None,
+    ) -> CALLBACK_TYPE:
+        """Add locations to the next request and listen for new data.
+
+        Large responses are decoded with the process pool while any
+        subscriber that passed one is subscribed.
+        """
+        location_names = tuple(location_names)
+        for location_name in location_names:
+            self._subscribers[location_name] = self._subscribers.get(location_name, 0) + 1
+            if (data := self._restored.pop(location_name, None)) is not None:
+                if location_name not in self._slices:
+                    self._slices[location_name] = data
+                    self._restore_table(
+                        location_name, self._restored_tables.pop(location_name, None)
+                    )
+        self._listeners.append(update_callback)
+        if process_pool is not None:
+            self._process_pools[update_callback] = process_pool
+        self._update_process_pool()
+        if self._unsub_timer is None:
+            now = datetime.now(tz=timezone(timedelta(hours=8)))
+            self._schedule_refresh(self.scheduler.next_fetch(now))
+
+        @callback
+        def unsubscribe() -> None:
+            """Remove the locations from the next request."""
+            self._listeners.remove(update_callback)
+            self._process_pools.pop(update_callback, None)
+            self._update_process_pool()
+            for location_name in location_names:
+                count = self._subscribers.get(location_name, 0) - 1
+                if count > 0:
+                    self._subscribers[location_name] = count
+                else:
+                    self._subscribers.pop(location_name, None)
+                    self._slices.pop(location_name, None)
+                    self._tables.pop(location_name, None)
+            if not self._subscribers and self._unsub_timer is not None:
+                self._unsub_timer()
+                self._unsub_timer = None
+
+        return unsubscribe
+
+    @property
+    def uses_process_pool(self) -> bool:
+        """Return True if any subscriber still asks for the process pool."""
+        return bool(self._process_pools)
+
+    @callback
+    def _update_process_pool(self) -> None:
+        """Use the process pool only while a subscriber asks for it."""
+        self.api.process_pool = next(iter(self._process_pools.values()), None)
+
+    @callback
+    def _schedule_refresh(self, when: datetime) -> None:
+        """Schedule the next refresh of the dataset."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass, self._async_scheduled_refresh, when
+        )
+
+    async def _async_scheduled_refresh(self, _now: datetime) -> None:
+        """Refresh after a publication, retrying until newer data shows up."""
+        self._unsub_timer = None
+        previous_issue_time = self.issue_time
+        try:
+            await self.async_refresh()
+        finally:
+            # 即使更新失敗也要排定下一次更新，否則此資料集不會再更新
+            if self._subscribers and self._unsub_timer is None:
+                self._schedule_next_refresh(previous_issue_time)
+
+    @callback
+    def _schedule_next_refresh(self, previous_issue_time: datetime | None) -> None:
+        """Schedule the next publication, or a retry while the issue has not moved."""
+        now = datetime.now(tz=timezone(timedelta(hours=8)))
+        next_fetch = self.scheduler.next_fetch(now)
+        if self.scheduler.is_current(self.issue_time, previous_issue_time, now):
+            self._retry_attempt = 0
+            self._schedule_refresh(next_fetch)
+            return
+
+        # 尚未取得新發布的資料，退避後重試直到下一次發布時間
+        retry_at = now + self.scheduler.retry_delay(self._retry_attempt)
+        self._retry_attempt += 1
+        if retry_at >= next_fetch:
+            self._retry_attempt = 0
+            retry_at = next_fetch
+        _LOGGER.debug(
+            "No new issue of %s-%s yet, retrying at %s",
+            self.forecast_type,
+            self.endpoint,
+            retry_at,
+        )
+        self._schedule_refresh(retry_at)
+
+    def get_location(self, location_name: str) -> dict[str, Any] | None:
+        """Return the last fetched response sliced to one location."""
+        return self._slices.get(location_name)
+
+    def get_table(self, location_name: str) -> ForecastTable | None:
+        """Return the table aligned in a worker process for the last response, if any."""
+        return self._tables.get(location_name)
+
+    async def async_load(self) -> None:
+        """Restore the last good response from storage, once per fetcher."""
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(
+                self._async_load(), f"{DOMAIN} load {self.endpoint}"
+            )
+        await asyncio.shield(self._load_task)
+
+    async def _async_load(self) -> None:
+        """Load stored slices if they are recent enough to still be useful."""
+        if not (stored := await self._store.async_load()):
+            return
+
+        try:
+            fetched_at = datetime.fromisoformat(stored["fetched_at"])
+            locations = stored["locations"]
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.debug("Ignoring invalid stored data for %s", self.endpoint)
+            return
+
+        now = datetime.now(tz=timezone(timedelta(hours=8)))
+        if now - fetched_at > timedelta(hours=RESTORE_MAX_AGE):
+            return
+        if self.last_update_time is not None:
+            # 啟動期間已經取得較新的資料
+            return
+
+        tables = stored.get("tables") or {}
+        # 只還原目前訂閱的位置，其餘位置等到有設定訂閱時才使用，不會再寫回儲存
+        self._restored = {
+            name: data for name, data in locations.items() if name not in self._subscribers
+        }
+        self._restored_tables = {
+            name: table for name, table in tables.items() if name in self._restored
+        }
+        locations = {
+            name: data for name, data in locations.items() if name in self._subscribers
+        }
+        self.last_update_time = fetched_at
+        self._slices.update(locations)
+        for name in locations:
+            self._restore_table(name, tables.get(name))
+        self.issue_time = min(
+            (
+                issue_time
+                for data in locations.values()
+                if (issue_time := extract_issue_time(data)) is not None
+            ),
+            default=None,
+        )
+        _LOGGER.debug(
+            "Restored %s-%s fetched at %s for %d locations",
+            self.forecast_type,
+            self.endpoint,
+            fetched_at,
+            len(locations),
+        )
+
+    def _restore_table(self, location_name: str, data: dict[str, Any] | None) -> None:
+        """Restore the stored table of a location aligned in a worker process."""
+        if data is None:
+            return
+        try:
+            self._tables[location_name] = ForecastTable.from_dict(data)
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.debug("Ignoring invalid stored table of %s", location_name)
+
+    @callback
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the data to persist.
+
+        Locations aligned in a worker process are stored without their
+        elements, so their tables are stored along with them.
+        """
+        return {
+            "fetched_at": self.last_update_time.isoformat(),
+            "locations": self._slices,
+            "tables": {name: table.as_dict() for name, table in self._tables.items()},
+        }
+
+    async def async_refresh(self) -> None:
+        """Fetch the dataset for every subscribed location now."""
+        if self._fetch_task is None:
+            self._fetching = frozenset(self._subscribers)
+            self._fetch_task = self.hass.async_create_task(
+                self._async_fetch(self._fetching),
+                f"{DOMAIN} fetch {self.endpoint}",
+            )
+        await asyncio.shield(self._fetch_task)
+
+    async def async_get_location(self, location_name: str) -> dict[str, Any] | None:
+        """Return the response for a location, fetching it if needed.
+
+        A response fetched within the reuse window is shared, so coordinators
+        polling at the same moment only cause one request.
+        """
+        while True:
+            if self._is_fresh(location_name):
+                return self._slices[location_name]
+
+            if self._fetch_task is None:
+                self._fetching = frozenset(self._subscribers) | {location_name}
+                self._fetch_task = self.hass.async_create_task(
+                    self._async_fetch(self._fetching),
+                    f"{DOMAIN} fetch {self.endpoint}",
+                )
+
+            # 進行中的請求若未包含此位置，等待完成後再發送一次
+            included = location_name in self._fetching
+            await asyncio.shield(self._fetch_task)
+            if included:
+                return self._slices.get(location_name)
+
+    def _is_fresh(self, location_name: str) -> bool:
+        """Return True if the location was fetched within the reuse window."""
+        if location_name not in self._slices or self.last_update_time is None:
+            return False
+        now = datetime.now(tz=timezone(timedelta(hours=8)))
+        return now - self.last_update_time < timedelta(minutes=FETCH_REUSE_WINDOW)
+
+    @callback
+    def _record_failure(self) -> None:
+        """Count a failed fetch, telling the listeners when the failures start."""
+        self.consecutive_failures += 1
+        if self.consecutive_failures == 1:
+            # 只在開始失敗時通知一次，讓實體標示資料已過時
+            _call_listeners(self._listeners)
+
+    async def _async_fetch(self, location_names: frozenset[str]) -> None:
+        """Fetch the dataset once and slice it per location."""
+        previous_issue_time = self.issue_time
+        try:
+            data = await self.api.fetch_dataset(
+                self.forecast_type, self.endpoint, sorted(location_names)
+            )
+            if not data:
+                self._record_failure()
+                return
+
+            self.consecutive_failures = 0
+
+            if data is self._last_data and location_names <= self._slices.keys():
+                # 內容未變更，保留原本的切片讓解析器略過重新對齊，
+                # 但仍通知訂閱者資料在此時確認為最新
+                self.last_update_time = self.api.last_update_time
+                _call_listeners(self._listeners)
+                return
+
+            self._last_data = data
+            self._restored.clear()
+            self._restored_tables.clear()
+            slices = {}
+            for location in data["records"]["Locations"][0]["Location"]:
+                name = location["LocationName"]
+                if name in location_names:
+                    slices[name] = _slice_location(data, location)
+
+            self._slices.update(slices)
+            tables = self.api.tables_for(data)
+            for name in slices:
+                if name in tables:
+                    self._tables[name] = tables[name]
+                else:
+                    self._tables.pop(name, None)
+            self.last_update_time = self.api.last_update_time
+            self.issue_time = extract_issue_time(data)
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+            _LOGGER.debug(
+                "Fetched %s-%s issued at %s for %d locations",
+                self.forecast_type,
+                self.endpoint,
+                self.issue_time,
+                len(slices),
+            )
+            _call_listeners(self._listeners)
+        except (KeyError, IndexError) as err:
+            _LOGGER.error("Unexpected dataset layout from %s: %s", self.endpoint, err)
+            self._record_failure()
+        except Exception:
+            # 任何非預期的錯誤都視為一次失敗，不能中斷排程
+            _LOGGER.exception("Unexpected error fetching %s-%s", self.forecast_type, self.endpoint)
+            self._record_failure()
+        finally:
+            self._fetch_task = None
+            self._fetching = frozenset()
+            if not self._first_fetch_checked and self._subscribers:
+                self._first_fetch_checked = True
+                self._schedule_next_refresh(previous_issue_time)
+
+
+class CWAObservationFetcher:
+    """Fetch weather station observations for the subscribed stations.
+
+    The nearest-station index is built once from a full download of every
+    observation dataset. Later refreshes only request the subscribed
+    stations, every OBSERVATION_INTERVAL minutes, and keep the latest
+    observation of each of them.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: CWAAPIClient) -> None:
+        """Initialize the fetcher."""
+        self.hass = hass
+        self.api = api
+        self.index: StationIndex | None = None
+        self.last_update_time: datetime | None = None
+        self.consecutive_failures = 0
+        self._subscribers: dict[str, int] = {}
+        self._listeners: list[Callable[[], None]] = []
+        self._observations: dict[str, Observation] = {}
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._index_task: asyncio.Task[None] | None = None
+
+    @property
+    def key(self) -> ObservationFetcherKey:
+        """Return the registry key of the fetcher."""
+        return self.api.base_url, self.api.api_key
+
+    @property
+    def has_subscribers(self) -> bool:
+        """Return True if any station is still subscribed."""
+        return bool(self._subscribers)
+
+    async def async_nearest_stations(
+        self, coordinates: Mapping[str, tuple[float, float]]
+    ) -> dict[str, str] | None:
+        """Return the nearest station of each location, or None if the index is unavailable.
+
+        Locations without a station within OBSERVATION_MAX_DISTANCE are left out.
+        """
+        if self.index is None:
+            if self._index_task is None:
+                self._index_task = self.hass.async_create_task(
+                    self._async_build_index(), f"{DOMAIN} station index"
+                )
+            await asyncio.shield(self._index_task)
+        if self.index is None:
+            return None
+
+        stations = {}
+        for name, (latitude, longitude) in coordinates.items():
+            if (nearest := self.index.nearest(latitude, longitude)) is None:
+                continue
+            station_id, distance = nearest
+            if distance <= OBSERVATION_MAX_DISTANCE:
+                stations[name] = station_id
+            else:
+                _LOGGER.debug("No weather station within %s km of %s", OBSERVATION_MAX_DISTANCE, name)
+        return stations
+
+    async def _async_build_index(self) -> None:
+        """Download every station once to build the nearest-station index."""
+        stations: dict[str, list[dict[str, Any]]] = {}
+        try:
+            for dataset_id in OBSERVATION_DATASETS:
+                if not (data := await self.api.fetch_observation(dataset_id)):
+                    return
+                try:
+                    stations[dataset_id] = data["records"]["Station"]
+                except (KeyError, TypeError) as err:
+                    _LOGGER.error("Unexpected dataset layout from %s: %s", dataset_id, err)
+                    return
+        finally:
+            self._index_task = None
+
+        self.index = StationIndex(stations)
+        # 建立索引時的觀測值先保留，下一次更新後只留下有訂閱的氣象站
+        self._store_observations(
+            station for dataset_stations in stations.values() for station in dataset_stations
+        )
+        self.last_update_time = self.api.last_update_time
+        _LOGGER.debug("Indexed %d weather stations", len(self.index))
+
+    @callback
+    def subscribe(
+        self, station_ids: Iterable[str], update_callback: Callable[[], None]
+    ) -> CALLBACK_TYPE:
+        """Add stations to the next request and listen for new observations."""
+        station_ids = tuple(station_ids)
+        for station_id in station_ids:
+            self._subscribers[station_id] = self._subscribers.get(station_id, 0) + 1
+        self._listeners.append(update_callback)
+        if self._unsub_timer is None:
+            self._schedule_refresh()
+
+        @callback
+        def unsubscribe() -> None:
+            """Remove the stations from the next request."""
+            self._listeners.remove(update_callback)
+            for station_id in station_ids:
+                count = self._subscribers.get(station_id, 0) - 1
+                if count > 0:
+                    self._subscribers[station_id] = count
+                else:
+                    self._subscribers.pop(station_id, None)
+                    self._observations.pop(station_id, None)
+            if not self._subscribers and self._unsub_timer is not None:
+                self._unsub_timer()
+                self._unsub_timer = None
+
+        return unsubscribe
+
+    def get_observation(self, station_id: str) -> Observation | None:
+        """Return the latest observation of a station."""
+        return self._observations.get(station_id)
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule the next refresh just after the next observation."""
+        now = datetime.now(tz=timezone(timedelta(hours=8)))
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass,
+            self._async_scheduled_refresh,
+            next_interval(
+                now,
+                timedelta(minutes=OBSERVATION_INTERVAL),
+                timedelta(minutes=OBSERVATION_DELAY),
+            ),
+        )
+
+    async def _async_scheduled_refresh(self, _now: datetime) -> None:
+        """Refresh and schedule the next refresh."""
+        self._unsub_timer = None
+        try:
+            await self._async_fetch()
+        finally:
+            if self._subscribers and self._unsub_timer is None:
+                self._schedule_refresh()
+
+    async def _async_fetch(self) -> None:
+        """Fetch the subscribed stations, one request per dataset."""
+        if self.index is None:
+            return
+        by_dataset: dict[str, list[str]] = {}
+        for station_id in sorted(self._subscribers):
+            by_dataset.setdefault(self.index.datasets[station_id], []).append(station_id)
+
+        stations: list[dict[str, Any]] = []
+        for dataset_id, station_ids in by_dataset.items():
+            data = await self.api.fetch_observation(dataset_id, station_ids)
+            try:
+                stations.extend(data["records"]["Station"])
+            except (KeyError, TypeError):
+                self.consecutive_failures += 1
+                return
+
+        self.consecutive_failures = 0
+        self.last_update_time = self.api.last_update_time
+        # 只保留有訂閱的氣象站
+        self._observations = {
+            station_id: observation
+            for station_id, observation in self._observations.items()
+            if station_id in self._subscribers
+        }
+        if self._store_observations(stations):
+            _call_listeners(self._listeners)
+
+    def _store_observations(self, stations: Iterable[dict[str, Any]]) -> bool:
+        """Keep the newest observation of each station, returning True if any changed."""
+        changed = False
+        for station in stations:
+            if (observation := parse_station(station)) is None:
+                continue
+            previous = self._observations.get(observation.station_id)
+            if previous is None or observation.time > previous.time:
+                self._observations[observation.station_id] = observation
+                changed = True
+        return changed
+
+
+class SlotClock:
+    """Integration-wide clock that ticks at forecast slot boundaries.
+
+    The current conditions come from the forecast time nearest to now, which
+    only changes half way between two forecast times. The clock works out the
+    current slot once per boundary and calls every subscribed coordinator,
+    instead of each coordinator tracking the time on its own.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the clock."""
+        self.hass = hass
+        self._interval = timedelta(minutes=FORECAST_SLOT)
+        self.slot = self._current_slot(datetime.now(tz=timezone(timedelta(hours=8))))
+        self._listeners: list[Callable[[datetime], None]] = []
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    def _current_slot(self, now: datetime) -> datetime:
+        """Return the start of the slot containing now, preferring the earlier one on ties."""
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        slot = midnight + (now - midnight) // self._interval * self._interval
+        if now - slot > self._interval / 2:
+            slot += self._interval
+        return slot
+
+    @callback
+    def subscribe(self, update_callback: Callable[[datetime], None]) -> CALLBACK_TYPE:
+        """Call update_callback with the new slot at every boundary."""
+        self._listeners.append(update_callback)
+        if self._unsub_timer is None:
+            self.slot = self._current_slot(datetime.now(tz=timezone(timedelta(hours=8))))
+            self._schedule_tick()
+
+        @callback
+        def unsubscribe() -> None:
+            """Stop calling update_callback."""
+            self._listeners.remove(update_callback)
+            if not self._listeners and self._unsub_timer is not None:
+                self._unsub_timer()
+                self._unsub_timer = None
+
+        return unsubscribe
+
+    @callback
+    def _schedule_tick(self) -> None:
+        """Schedule the tick at the boundary after the current slot."""
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass, self._async_tick, self.slot + self._interval / 2
+        )
+
+    @callback
+    def _async_tick(self, _now: datetime) -> None:
+        """Move to the next slot and notify the subscribers."""
+        # 以排程的邊界計算，不受計時器延遲影響
+        self.slot += self._interval
+        self._schedule_tick()
+        _call_listeners(self._listeners, self.slot)
+
+
+@callback
+def async_get_clock(hass: HomeAssistant) -> SlotClock:
+    """Return the clock shared by the whole integration."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (clock := domain_data.get(DATA_CLOCK)) is None:
+        clock = domain_data[DATA_CLOCK] = SlotClock(hass)
+    return clock
+
+
+async def async_get_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the HTTP session shared by the whole integration, creating it if needed.
+
+    The session keeps a small pool of keep-alive connections to CWA with the
+    pinned certificate loaded once, instead of one pool per entry.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (session := domain_data.get(DATA_SESSION)) is not None and not session.closed:
+        return session
+
+    ssl_context = await async_get_ssl_context()
+    if (session := domain_data.get(DATA_SESSION)) is not None and not session.closed:
+        # 等待憑證載入期間已由其他設定建立
+        return session
+
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=API_CONNECTION_LIMIT,
+            limit_per_host=API_CONNECTION_LIMIT,
+            keepalive_timeout=API_KEEPALIVE_TIMEOUT,
+            ssl=ssl_context if ssl_context is not None else True,
+        ),
+    )
+    domain_data[DATA_SESSION] = session
+
+    async def _async_close_session(_event: Event) -> None:
+        """Close the session when Home Assistant stops."""
+        domain_data.pop(DATA_SESSION_UNSUB, None)
+        await async_close_session(hass)
+
+    domain_data[DATA_SESSION_UNSUB] = hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_CLOSE, _async_close_session
+    )
+    return session
+
+
+async def async_close_session(hass: HomeAssistant) -> None:
+    """Close the shared HTTP session once no entry uses it."""
+    domain_data = hass.data.get(DOMAIN, {})
+    if (unsub := domain_data.pop(DATA_SESSION_UNSUB, None)) is not None:
+        unsub()
+    if (session := domain_data.pop(DATA_SESSION, None)) is not None:
+        await session.close()
+
+
+@callback
+def async_get_process_pool(hass: HomeAssistant) -> ProcessPoolExecutor:
+    """Return the worker processes shared by the whole integration, creating them if needed.
+
+    The workers are started on first use, with spawn so that the Home
+    Assistant process is not forked.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (pool := domain_data.get(DATA_PROCESS_POOL)) is not None:
+        return pool
+
+    pool = domain_data[DATA_PROCESS_POOL] = ProcessPoolExecutor(
+        max_workers=PROCESS_POOL_MAX_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+    @callback
+    def _async_shutdown_process_pool(_event: Event) -> None:
+        """Stop the workers when Home Assistant stops."""
+        domain_data.pop(DATA_PROCESS_POOL_UNSUB, None)
+        async_shutdown_process_pool(hass)
+
+    domain_data[DATA_PROCESS_POOL_UNSUB] = hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_CLOSE, _async_shutdown_process_pool
+    )
+    return pool
+
+
+@callback
+def async_shutdown_process_pool(hass: HomeAssistant) -> None:
+    """Stop the shared worker processes once no entry uses them."""
+    domain_data = hass.data.get(DOMAIN, {})
+    if (unsub := domain_data.pop(DATA_PROCESS_POOL_UNSUB, None)) is not None:
+        unsub()
+    if (pool := domain_data.pop(DATA_PROCESS_POOL, None)) is not None:
+        # 已送出的解析仍會完成，避免其他請求等待的結果被取消
+        pool.shutdown(wait=False)
+
+
+@callback
+def async_release_process_pool(hass: HomeAssistant) -> None:
+    """Stop the shared worker processes once no subscriber asks for them."""
+    fetchers: dict[FetcherKey, CWADatasetFetcher] = hass.data.get(DOMAIN, {}).get(
+        DATA_FETCHERS, {}
+    )
+    if not any(fetcher.uses_process_pool for fetcher in fetchers.values()):
+        async_shutdown_process_pool(hass)
+
+
+@callback
+def async_get_fetcher(
+    hass: HomeAssistant,
+    api_key: str,
+    forecast_type: str,
+    endpoint: str,
+    forecast_duration: str,
+    base_url: str = API_BASE_URL,
+) -> CWADatasetFetcher:
+    """Return the shared fetcher of a dataset, creating it if needed.
+
+    The shared session must have been set up with async_get_session first.
+    """
+    domain_data = hass.data[DOMAIN]
+    fetchers: dict[FetcherKey, CWADatasetFetcher] = domain_data.setdefault(
+        DATA_FETCHERS, {}
+    )
+    key = (forecast_type, endpoint, forecast_duration, base_url.rstrip("/"), api_key)
+    if (fetcher := fetchers.get(key)) is None:
+        api = CWAAPIClient(api_key, domain_data[DATA_SESSION], base_url)
+        scheduler = PublicationScheduler(
+            PUBLICATION_HOURS[forecast_duration],
+            timedelta(minutes=PUBLICATION_DELAY),
+            timedelta(minutes=RETRY_BASE_DELAY),
+            timedelta(minutes=RETRY_MAX_DELAY),
+        )
+        fetcher = CWADatasetFetcher(
+            hass, api, forecast_type, endpoint, forecast_duration, scheduler
+        )
+        fetchers[key] = fetcher
+    return fetcher
+
+
+@callback
+def async_release_fetcher(hass: HomeAssistant, fetcher: CWADatasetFetcher) -> None:
+    """Drop a fetcher from the registry once nobody is subscribed."""
+    if fetcher.has_subscribers:
+        return
+    fetchers: dict[FetcherKey, CWADatasetFetcher] = hass.data.get(DOMAIN, {}).get(
+        DATA_FETCHERS, {}
+    )
+    if fetchers.get(fetcher.key) is fetcher:
+        fetchers.pop(fetcher.key)
+    fetcher.api.close()
+
+
+@callback
+def async_get_observation_fetcher(
+    hass: HomeAssistant, api_key: str, base_url: str = API_BASE_URL
+) -> CWAObservationFetcher:
+    """Return the shared observation fetcher, creating it if needed."""
+    domain_data = hass.data[DOMAIN]
+    fetchers: dict[ObservationFetcherKey, CWAObservationFetcher] = domain_data.setdefault(
+        DATA_OBSERVATION_FETCHERS, {}
+    )
+    key = (base_url.rstrip("/"), api_key)
+    if (fetcher := fetchers.get(key)) is None:
+        api = CWAAPIClient(api_key, domain_data[DATA_SESSION], base_url)
+        fetcher = fetchers[key] = CWAObservationFetcher(hass, api)
+    return fetcher
+
+
+@callback
+def async_release_observation_fetcher(
+    hass: HomeAssistant, fetcher: CWAObservationFetcher
+) -> None:
+    """Drop an observation fetcher from the registry once nobody is subscribed."""
+    if fetcher.has_subscribers:
+        return
+    fetchers: dict[ObservationFetcherKey, CWAObservationFetcher] = hass.data.get(DOMAIN, {}).get(
+        DATA_OBSERVATION_FETCHERS, {}
+    )
+    if fetchers.get(fetcher.key) is fetcher:
+        fetchers.pop(fetcher.key)
+    fetcher.api.close()
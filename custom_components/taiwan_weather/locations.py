@@ -0,0 +1,73 @@
+"""Lookup index of the counties and districts served by the CWA datasets."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import cache
+from types import MappingProxyType
+
+from .const import API_LOCATION_MAPPING
+
+# 全臺資料集的名稱，其鄉鎮列表為各縣市
+COUNTRY = "臺灣"
+
+
+def normalize_name(name: str) -> str:
+    """Return a location name with 台 written as 臺, as used by CWA."""
+    return name.replace("台", "臺")
+
+
+@dataclass(frozen=True, slots=True)
+class LocationIndex:
+    """Frozen lookups built once from API_LOCATION_MAPPING."""
+
+    forecast_type: str
+    dataset_id: str
+    cities: tuple[str, ...]
+    districts: Mapping[str, tuple[str, ...]]
+    district_sets: Mapping[str, frozenset[str]]
+    endpoints: Mapping[str, Mapping[str, str]]
+
+    def has_district(self, city: str, district: str) -> bool:
+        """Return True if the district belongs to the city."""
+        return normalize_name(district) in self.district_sets.get(
+            normalize_name(city), frozenset()
+        )
+
+    def endpoint(self, city: str, forecast_duration: str) -> str:
+        """Return the endpoint code of the dataset of a city.
+
+        Raises:
+            KeyError: If the city or forecast duration is unknown.
+
+        """
+        return self.endpoints[normalize_name(city)][forecast_duration]
+
+
+@cache
+def get_location_index(forecast_type: str = "鄉鎮天氣預報") -> LocationIndex:
+    """Return the lookup index of a forecast type, building it on first use."""
+    mapping = API_LOCATION_MAPPING[forecast_type]
+    districts: dict[str, tuple[str, ...]] = {}
+    endpoints: dict[str, Mapping[str, str]] = {}
+
+    for city, location_data in mapping["location"].items():
+        districts[city] = tuple(location_data["district"])
+        endpoints[city] = MappingProxyType(
+            {
+                duration: location_data[duration]
+                for duration in mapping["forecast_duration_type"]
+            }
+        )
+
+    return LocationIndex(
+        forecast_type=forecast_type,
+        dataset_id=mapping["id"],
+        cities=tuple(districts),
+        districts=MappingProxyType(districts),
+        district_sets=MappingProxyType(
+            {city: frozenset(names) for city, names in districts.items()}
+        ),
+        endpoints=MappingProxyType(endpoints),
+    )
@@ -0,0 +1,50 @@
+"""Data models for Taiwan Weather."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from homeassistant.components.weather import Forecast
+
+
+@dataclass(frozen=True, slots=True)
+class WeatherSnapshot:
+    """Current conditions and forecast, computed once per refresh and hour."""
+
+    time: str
+    condition: str | None = None
+    native_temperature: float | None = None
+    native_apparent_temperature: float | None = None
+    humidity: int | None = None
+    native_dew_point: float | None = None
+    wind_bearing: str | None = None
+    native_wind_speed: float | None = None
+    beaufort_scale: int | None = None
+    precipitation_probability: int | None = None
+    comfort_index: float | None = None
+    comfort_index_description: str | None = None
+    weather_description: str | None = None
+    hourly_forecast: tuple[Forecast, ...] | None = None
+    daily_forecast: tuple[Forecast, ...] | None = None
+    twice_daily_forecast: tuple[Forecast, ...] | None = None
+    last_update_time: datetime | None = None
+    stale: bool = False
+    observation_station: str | None = None
+    observation_time: datetime | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Observation:
+    """Latest readings of a weather station."""
+
+    station_id: str
+    station_name: str
+    time: datetime
+    native_temperature: float | None = None
+    humidity: int | None = None
+    native_wind_speed: float | None = None
+    wind_bearing: str | None = None
+    native_pressure: float | None = None
+    native_precipitation: float | None = None
+    weather: str | None = None
@@ -0,0 +1,129 @@
+"""Parse CWA weather station observations."""
+
+from __future__ import annotations
+
+from array import array
+from datetime import datetime
+import math
+from typing import Any
+
+from .models import Observation
+
+# 八方位風向，與鄉鎮預報的風向文字相同
+WIND_DIRECTIONS = ("偏北風", "東北風", "偏東風", "東南風", "偏南風", "西南風", "偏西風", "西北風")
+
+# 觀測資料以-99、-990等負值表示缺值或儀器故障
+_MISSING_THRESHOLD = -98
+
+
+def wind_direction_name(degrees: float | None) -> str | None:
+    """Return the 8-point Chinese name of a wind direction in degrees."""
+    if degrees is None:
+        return None
+    if degrees == 0:
+        # 氣象署以0度表示靜風，360度為北風
+        return "靜風"
+    return WIND_DIRECTIONS[int((degrees % 360 + 22.5) // 45) % 8]
+
+
+def _obs_value(value: Any) -> float | None:
+    """Convert an observation value, using None for missing readings."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(number) or number <= _MISSING_THRESHOLD:
+        return None
+    return number
+
+
+def _coordinates(station: dict[str, Any]) -> tuple[float, float] | None:
+    """Return the WGS84 latitude and longitude of a station."""
+    for coordinate in station.get("GeoInfo", {}).get("Coordinates", []):
+        if coordinate.get("CoordinateName") == "WGS84":
+            latitude = _obs_value(coordinate.get("StationLatitude"))
+            longitude = _obs_value(coordinate.get("StationLongitude"))
+            if latitude is not None and longitude is not None:
+                return latitude, longitude
+    return None
+
+
+def parse_station(station: dict[str, Any]) -> Observation | None:
+    """Parse the latest readings of one station, or None if it has no time."""
+    try:
+        time = datetime.fromisoformat(station["ObsTime"]["DateTime"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    element = station.get("WeatherElement", {})
+    wind_speed = _obs_value(element.get("WindSpeed"))
+    wind_degrees = _obs_value(element.get("WindDirection"))
+    humidity = _obs_value(element.get("RelativeHumidity"))
+    weather = element.get("Weather")
+    if not isinstance(weather, str) or weather.lstrip("-").isdigit():
+        # 自動氣象站沒有天氣現象，以-99表示
+        weather = None
+    return Observation(
+        station_id=station["StationId"],
+        station_name=station.get("StationName", ""),
+        time=time,
+        native_temperature=_obs_value(element.get("AirTemperature")),
+        humidity=int(humidity) if humidity is not None else None,
+        native_wind_speed=wind_speed,
+        wind_bearing=wind_direction_name(wind_degrees),
+        native_pressure=_obs_value(element.get("AirPressure")),
+        native_precipitation=_obs_value(element.get("Now", {}).get("Precipitation")),
+        weather=weather or None,
+    )
+
+
+class StationIndex:
+    """Nearest-station lookup built once from the station coordinates.
+
+    Coordinates are stored as radians in arrays; distances use the
+    equirectangular approximation, which is accurate at Taiwan's scale.
+    """
+
+    __slots__ = ("station_ids", "datasets", "_latitudes", "_longitudes")
+
+    def __init__(self, stations: dict[str, list[dict[str, Any]]]) -> None:
+        """Index the stations of every observation dataset."""
+        self.station_ids: list[str] = []
+        self.datasets: dict[str, str] = {}
+        self._latitudes = array("d")
+        self._longitudes = array("d")
+        for dataset_id, dataset_stations in stations.items():
+            for station in dataset_stations:
+                station_id = station.get("StationId")
+                if (
+                    not station_id
+                    or station_id in self.datasets
+                    or (coordinates := _coordinates(station)) is None
+                ):
+                    continue
+                self.station_ids.append(station_id)
+                self.datasets[station_id] = dataset_id
+                self._latitudes.append(math.radians(coordinates[0]))
+                self._longitudes.append(math.radians(coordinates[1]))
+
+    def __len__(self) -> int:
+        """Return the number of indexed stations."""
+        return len(self.station_ids)
+
+    def nearest(self, latitude: float, longitude: float) -> tuple[str, float] | None:
+        """Return the closest station and its distance in kilometres."""
+        if not self.station_ids:
+            return None
+        latitude = math.radians(latitude)
+        longitude = math.radians(longitude)
+        scale = math.cos(latitude)
+        best_index, best = 0, math.inf
+        for index, (station_latitude, station_longitude) in enumerate(
+            zip(self._latitudes, self._longitudes)
+        ):
+            distance = (station_latitude - latitude) ** 2 + (
+                (station_longitude - longitude) * scale
+            ) ** 2
+            if distance < best:
+                best_index, best = index, distance
+        return self.station_ids[best_index], math.sqrt(best) * 6371
@@ -0,0 +1,105 @@
+"""Publication-aware refresh scheduling for Taiwan Weather."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import random
+from typing import Any
+
+
+def jittered_backoff(attempt: int, base: float, maximum: float) -> float:
+    """Return an exponential backoff in seconds with +/-20% jitter."""
+    delay = min(base * 2 ** min(attempt, 10), maximum)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def next_interval(now: datetime, interval: timedelta, delay: timedelta) -> datetime:
+    """Return the first fetch time after now for data published every interval."""
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    slots = (now - midnight - delay) // interval + 1
+    return midnight + slots * interval + delay
+
+
+def extract_issue_time(data: dict[str, Any]) -> datetime | None:
+    """Return the issue time of a forecast response.
+
+    An explicit IssueTime is used when CWA provides one. Otherwise the first
+    forecast time is used, since it moves forward with every publication.
+    """
+    try:
+        locations = data["records"]["Locations"][0]
+        if issue_time := locations.get("IssueTime"):
+            return datetime.fromisoformat(issue_time)
+
+        times = [
+            time_data.get("DataTime") or time_data.get("StartTime")
+            for location in locations["Location"]
+            for element in location.get("WeatherElement", [])
+            for time_data in element["Time"][:1]
+        ]
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+    times = [time for time in times if time]
+    return datetime.fromisoformat(min(times)) if times else None
+
+
+class PublicationScheduler:
+    """Work out when a dataset is worth fetching again."""
+
+    def __init__(
+        self,
+        publication_hours: tuple[int, ...],
+        delay: timedelta,
+        retry_base: timedelta,
+        retry_max: timedelta,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.publication_hours = tuple(sorted(publication_hours))
+        self.delay = delay
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+    def next_fetch(self, now: datetime) -> datetime:
+        """Return the first fetch time after now, just after a publication."""
+        day = now.replace(minute=0, second=0, microsecond=0)
+        for days in (0, 1):
+            for hour in self.publication_hours:
+                fetch_time = day.replace(hour=hour) + timedelta(days=days) + self.delay
+                if fetch_time > now:
+                    return fetch_time
+        raise ValueError("No publication hours configured")
+
+    def latest_publication(self, now: datetime) -> datetime:
+        """Return the latest publication hour whose data should be out by now."""
+        day = now.replace(minute=0, second=0, microsecond=0)
+        for days in (0, 1):
+            for hour in reversed(self.publication_hours):
+                publication = day.replace(hour=hour) - timedelta(days=days)
+                if publication + self.delay <= now:
+                    return publication
+        raise ValueError("No publication hours configured")
+
+    def is_current(
+        self, issue_time: datetime | None, previous_issue_time: datetime | None, now: datetime
+    ) -> bool:
+        """Return True if an issue time is the latest expected publication.
+
+        An issue newer than the previous one also counts, in case CWA dates an
+        issue slightly before its publication hour.
+        """
+        if issue_time is None:
+            return False
+        if issue_time >= self.latest_publication(now):
+            return True
+        return previous_issue_time is not None and issue_time > previous_issue_time
+
+    def retry_delay(self, attempt: int) -> timedelta:
+        """Return a jittered exponential backoff for a retry attempt."""
+        return timedelta(
+            seconds=jittered_backoff(
+                attempt,
+                self.retry_base.total_seconds(),
+                self.retry_max.total_seconds(),
+            )
+        )
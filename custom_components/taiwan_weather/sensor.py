@@ -1,119 +1,207 @@
 """Support for Taiwan Weather sensors."""
-from datetime import datetime, timedelta, timezone
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from operator import attrgetter
 
 from homeassistant.components.datetime import DateTimeEntity
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.components.text import TextEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE, UnitOfSpeed, UnitOfTemperature
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.device_registry import DeviceEntryType
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.const import (
+    MAX_LENGTH_STATE_STATE,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfSpeed,
+    UnitOfTemperature,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DEFAULT_NAME, DOMAIN, MANUFACTURER
+from .const import DOMAIN
 from .coordinator import CWADataUpdateCoordinator
+from .entity import TaiwanWeatherEntity
+from .models import WeatherSnapshot
+
+
+@dataclass(frozen=True, kw_only=True)
+class TaiwanWeatherSensorEntityDescription(SensorEntityDescription):
+    """Describe a Taiwan Weather sensor and where its value comes from."""
+
+    value_fn: Callable[[WeatherSnapshot], float | str | datetime | None]
+
+
+@dataclass(frozen=True, kw_only=True)
+class TaiwanWeatherDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describe a performance metric of the refresh hot path."""
+
+    metric: str
+
+
+# 每個感測器直接讀取快照中已計算好的欄位，新增項目只需加入此表
+# 文字類及蒲福風級感測器預設停用，避免每個位置多出的實體與狀態寫入
+SENSOR_TYPES: tuple[TaiwanWeatherSensorEntityDescription, ...] = (
+    TaiwanWeatherSensorEntityDescription(
+        key="temperature",
+        name="Temperature",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        icon="mdi:thermometer",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=attrgetter("native_temperature"),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="dew_point",
+        name="Dew Point",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        icon="mdi:water",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=attrgetter("native_dew_point"),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="apparent_temperature",
+        name="Apparent Temperature",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        icon="mdi:thermometer",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=attrgetter("native_apparent_temperature"),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="comfort_index",
+        name="Comfort Index",
+        icon="mdi:baby-face-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=attrgetter("comfort_index"),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="comfort_index_description",
+        name="Comfort Description",
+        icon="mdi:text",
+        entity_registry_enabled_default=False,
+        value_fn=attrgetter("comfort_index_description"),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="relative_humidity",
+        name="Relative Humidity",
+        native_unit_of_measurement=PERCENTAGE,
+        icon="mdi:water-percent",
+        device_class=SensorDeviceClass.HUMIDITY,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=attrgetter("humidity"),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="wind_direction",
+        name="Wind Direction",
+        icon="mdi:compass",
+        device_class=SensorDeviceClass.ENUM,
+        value_fn=attrgetter("wind_bearing"),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="wind_speed",
+        name="Wind Speed",
+        native_unit_of_measurement=UnitOfSpeed.METERS_PER_SECOND,
+        icon="mdi:weather-windy",
+        device_class=SensorDeviceClass.WIND_SPEED,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=attrgetter("native_wind_speed"),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="beaufort_scale",
+        name="Beaufort Scale",
+        icon="mdi:weather-windy",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_registry_enabled_default=False,
+        value_fn=attrgetter("beaufort_scale"),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="precipitation_probability",
+        name="Precipitation Probability",
+        native_unit_of_measurement=PERCENTAGE,
+        icon="mdi:water",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=attrgetter("precipitation_probability"),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="weather_description",
+        name="Weather Description",
+        icon="mdi:text-box",
+        entity_registry_enabled_default=False,
+        # 狀態最長255字元，較長的綜合描述截斷
+        value_fn=lambda snapshot: (
+            snapshot.weather_description[:MAX_LENGTH_STATE_STATE]
+            if snapshot.weather_description is not None
+            else None
+        ),
+    ),
+    TaiwanWeatherSensorEntityDescription(
+        key="api_last_update_time",
+        name="API Last Update Time",
+        icon="mdi:clock-time-eight",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=attrgetter("last_update_time"),
+    ),
+)
+
+# 效能診斷用感測器，預設停用
+DIAGNOSTIC_SENSOR_TYPES: tuple[TaiwanWeatherDiagnosticSensorEntityDescription, ...] = (
+    TaiwanWeatherDiagnosticSensorEntityDescription(
+        key="fetch_latency",
+        name="Fetch Latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        metric="fetch_ms",
+    ),
+    TaiwanWeatherDiagnosticSensorEntityDescription(
+        key="payload_size",
+        name="Payload Size",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        icon="mdi:download-network",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        metric="payload_bytes",
+    ),
+    TaiwanWeatherDiagnosticSensorEntityDescription(
+        key="parse_time",
+        name="Parse Time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        icon="mdi:timer-cog-outline",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        metric="parse_ms",
+    ),
+    TaiwanWeatherDiagnosticSensorEntityDescription(
+        key="cache_hit_ratio",
+        name="Cache Hit Ratio",
+        native_unit_of_measurement=PERCENTAGE,
+        icon="mdi:cached",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        metric="cache_hit_ratio",
+    ),
+    TaiwanWeatherDiagnosticSensorEntityDescription(
+        key="skipped_writes",
+        name="Skipped State Writes",
+        icon="mdi:content-save-off-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=0,
+        metric="sensor_writes_skipped",
+    ),
+)
 
-SENSOR_TYPES = {
-    "temperature": {
-        "name": "Temperature",
-        "unit": UnitOfTemperature.CELSIUS,
-        "icon": "mdi:thermometer",
-        "device_class": SensorDeviceClass.TEMPERATURE,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "api_name": "Temperature"
-    },
-    "dew_point": {
-        "name": "Dew Point",
-        "unit": UnitOfTemperature.CELSIUS,
-        "icon": "mdi:water",
-        "device_class": SensorDeviceClass.TEMPERATURE,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "api_name": "DewPoint"
-    },
-    "apparent_temperature": {
-        "name": "Apparent Temperature",
-        "unit": UnitOfTemperature.CELSIUS,
-        "icon": "mdi:thermometer",
-        "device_class": SensorDeviceClass.TEMPERATURE,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "api_name": "ApparentTemperature"
-    },
-    "comfort_index": {
-        "name": "Comfort Index",
-        "unit": None,
-        "icon": "mdi:baby-face-outline",
-        "device_class": None,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "api_name": "ComfortIndex"
-    },
-    # "comfort_description": {
-    #     "name": "Comfort Description",
-    #     "unit": None,
-    #     "icon": "mdi:text",
-    #     "device_class": None,
-    #     "api_name": "ComfortIndexDescription"
-    # },
-    "relative_humidity": {
-        "name": "Relative Humidity",
-        "unit": PERCENTAGE,
-        "icon": "mdi:water-percent",
-        "device_class": SensorDeviceClass.HUMIDITY,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "api_name": "RelativeHumidity"
-    },
-    "wind_direction": {
-        "name": "Wind Direction",
-        "unit": None,
-        "icon": "mdi:compass",
-        "device_class": SensorDeviceClass.ENUM,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "api_name": "WindDirection"
-    },
-    "wind_speed": {
-        "name": "Wind Speed",
-        "unit": UnitOfSpeed.METERS_PER_SECOND,
-        "icon": "mdi:weather-windy",
-        "device_class": SensorDeviceClass.WIND_SPEED,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "api_name": "WindSpeed"
-    },
-    # "beaufort_scale": {
-    #     "name": "Beaufort Scale",
-    #     "unit": None,
-    #     "icon": "mdi:weather-windy",
-    #     "device_class": None,
-    #     "api_name": "BeaufortScale"
-    # },
-    "precipitation_probability": {
-        "name": "Precipitation Probability",
-        "unit": PERCENTAGE,
-        "icon": "mdi:water",
-        "device_class": None,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "api_name": "ProbabilityOfPrecipitation"
-    },
-    # "weather_description": {
-    #     "name": "Weather Description",
-    #     "unit": None,
-    #     "icon": "mdi:text-box",
-    #     "device_class": None,
-    #     "api_name": "WeatherDescription"
-    # }
-    "api_last_update_time": {
-        "name": "API Last Update Time",
-        "unit": None,
-        "icon": "mdi:clock-time-eight",
-        "device_class": SensorDeviceClass.TIMESTAMP,
-        "state_class": None,
-        "api_name": "last_update_time"
-    }
-}
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -123,81 +211,91 @@ async def async_setup_entry(
     """Set up Taiwan Weather sensors based on a config entry."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
 
-    entities = [TaiwanWeatherSensor(coordinator, config_entry, sensor_type) for sensor_type in SENSOR_TYPES]
+    # 批次設定時每個鄉鎮市區各有一組感測器，一次加入
+    entities = [
+        TaiwanWeatherSensor(coordinator, config_entry, location_name, description)
+        for location_name in coordinator.locations
+        for description in SENSOR_TYPES
+    ]
+    entities.extend(
+        TaiwanWeatherDiagnosticSensor(coordinator, config_entry, description)
+        for description in DIAGNOSTIC_SENSOR_TYPES
+    )
 
 
     async_add_entities(entities)
 
-class TaiwanWeatherSensor(CoordinatorEntity, SensorEntity, TextEntity, DateTimeEntity):
+class TaiwanWeatherSensor(TaiwanWeatherEntity, SensorEntity, TextEntity, DateTimeEntity):
     """Implementation of a Taiwan Weather sensor."""
 
+    entity_description: TaiwanWeatherSensorEntityDescription
+
     def __init__(
         self,
         coordinator: CWADataUpdateCoordinator,
         config_entry: ConfigEntry,
-        sensor_type: str,
+        location_name: str,
+        description: TaiwanWeatherSensorEntityDescription,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._config = config_entry
-        self._sensor_type = sensor_type
-        self._attr_unique_id = f"{config_entry.entry_id}_{sensor_type}"
-        self._attr_name = f"{config_entry.data.get("district")} {SENSOR_TYPES[sensor_type]['name']}"
-        self._attr_native_unit_of_measurement = SENSOR_TYPES[sensor_type]["unit"]
-        self._attr_device_class = SENSOR_TYPES[sensor_type]["device_class"]
-        self._attr_state_class = getattr(SENSOR_TYPES[sensor_type], "state_class", None)
-        self._attr_icon = SENSOR_TYPES[sensor_type]["icon"]
-        self._attr_device_info = DeviceInfo(
-            entry_type=DeviceEntryType.SERVICE,
-            identifiers={(DOMAIN, f"{config_entry.entry_id}")},
-            manufacturer=MANUFACTURER,
-            name=DEFAULT_NAME,
-        )
+        super().__init__(coordinator, config_entry, location_name, description.key)
+        self.entity_description = description
+        self._attr_name = f"{self.location_label} {description.name}"
+        # 取值函式於建立時決定，讀取時不需比對感測器類型
+        self._value_fn = description.value_fn
+        self._written_state: tuple[bool, float | str | datetime | None] | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state written when the entity was added."""
+        await super().async_added_to_hass()
+        self._written_state = (self.available, self.native_value)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if the value or availability changed."""
+        state = (self.available, self.native_value)
+        if state == self._written_state:
+            # 大部分更新只影響部分感測器，未變更的不寫入以減少記錄與推送
+            self.coordinator.sensor_writes["skipped"] += 1
+            return
+        self._written_state = state
+        self.coordinator.sensor_writes["written"] += 1
+        self.async_write_ha_state()
 
     @property
     def native_value(self) -> float | str | datetime | None:
         """Return the state of the sensor."""
-        if not self.coordinator.data:
+        if not (snapshot := self.snapshot):
             return None
+        return self._value_fn(snapshot)
 
-        try:
-            utc_plus_8 = timezone(timedelta(hours=8))
-            now_time = datetime.now(tz=utc_plus_8).strftime("%Y-%m-%dT%H:%M:00+08:00")  # 台北時間
-            # temperature
-            if self._sensor_type == "temperature":
-                return self.coordinator.parser.get_temperature(now_time)
-            # humidity
-            if self._sensor_type == "relative_humidity":
-                return self.coordinator.parser.get_humidity(now_time)
-            # apparent temperature
-            if self._sensor_type == "apparent_temperature":
-                return self.coordinator.parser.get_apparent_temperature(now_time)
-            # wind speed
-            if self._sensor_type == "wind_speed":
-                return self.coordinator.parser.get_wind_speed(now_time)
-            # wind direction
-            if self._sensor_type == "wind_direction":
-                return self.coordinator.parser.get_wind_direction(now_time)
-            # precipitation probability
-            if self._sensor_type == "precipitation_probability":
-                return self.coordinator.parser.get_precipitation_probability(now_time)
-            # dew point
-            if self._sensor_type == "dew_point":
-                return self.coordinator.parser.get_dew_point(now_time)
-            # comfort index
-            if self._sensor_type == "comfort_index":
-                return self.coordinator.parser.get_comfort_index(now_time)
-            # comfort index description
-            if self._sensor_type == "comfort_index_description":
-                return self.coordinator.parser.get_comfort_index_description(now_time)
-            # weather_description
-            if self._sensor_type == "weather_description":
-                return self.coordinator.parser.get_weather_description(now_time)
-            # api_last_update_time
-            if self._sensor_type == "api_last_update_time":
-                return self.coordinator.api.last_update_time
-
-        except (KeyError, IndexError, ValueError):
-            return None
 
-        return None
+class TaiwanWeatherDiagnosticSensor(TaiwanWeatherEntity, SensorEntity):
+    """Performance metric of the Taiwan Weather refresh hot path."""
+
+    entity_description: TaiwanWeatherDiagnosticSensorEntityDescription
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: CWADataUpdateCoordinator,
+        config_entry: ConfigEntry,
+        description: TaiwanWeatherDiagnosticSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry, None, description.key)
+        self.entity_description = description
+        self._metric = description.metric
+        self._attr_name = f"{config_entry.title} {description.name}"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the latest value of the metric."""
+        value = self.coordinator.get_metrics()[self._metric]
+        if value is None:
+            return None
+        if self._metric == "cache_hit_ratio":
+            return round(value * 100, 1)
+        return round(value, 1)
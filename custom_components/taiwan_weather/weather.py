@@ -1,5 +1,5 @@
 """Support for Taiwan Weather weather entity."""
-from datetime import datetime, timedelta, timezone
+from typing import Any
 
 from homeassistant.components.weather import (
     Forecast,
@@ -8,16 +8,12 @@ from homeassistant.components.weather import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import UnitOfSpeed, UnitOfTemperature
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.device_registry import DeviceEntryType
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import ATTRIBUTION, DEFAULT_NAME, DOMAIN, MANUFACTURER
+from .const import ATTRIBUTION, DOMAIN
 from .coordinator import CWADataUpdateCoordinator
-
-utc_plus_8 = timezone(timedelta(hours=8))
+from .entity import TaiwanWeatherEntity
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -26,54 +22,73 @@ async def async_setup_entry(
 ) -> None:
     """Set up Taiwan Weather weather entity based on a config entry."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
-    async_add_entities([TaiwanWeather(coordinator, config_entry)], False)
-
-class TaiwanWeather(CoordinatorEntity, WeatherEntity):
+    async_add_entities(
+        [
+            TaiwanWeather(coordinator, config_entry, location_name)
+            for location_name in coordinator.locations
+        ],
+        False,
+    )
+
+class TaiwanWeather(TaiwanWeatherEntity, WeatherEntity):
     """Implementation of Taiwan Weather weather entity."""
 
     _attr_attribution = ATTRIBUTION
     _attr_has_entity_name = True
     _attr_native_temperature_unit = UnitOfTemperature.CELSIUS
-    _attr_supported_features = WeatherEntityFeature.FORECAST_HOURLY
+    _attr_supported_features = (
+        WeatherEntityFeature.FORECAST_HOURLY
+        | WeatherEntityFeature.FORECAST_DAILY
+        | WeatherEntityFeature.FORECAST_TWICE_DAILY
+    )
 
     def __init__(
-        self, coordinator: CWADataUpdateCoordinator, config_entry: ConfigEntry
+        self,
+        coordinator: CWADataUpdateCoordinator,
+        config_entry: ConfigEntry,
+        location_name: str,
     ) -> None:
         """Initialize the weather entity."""
-        super().__init__(coordinator)
-        self._config = config_entry
-        self._attr_unique_id = f"{config_entry.entry_id}_weather"
-        self._attr_name = config_entry.data.get("district")
-        self._attr_device_info = DeviceInfo(
-            entry_type=DeviceEntryType.SERVICE,
-            identifiers={(DOMAIN, f"{config_entry.entry_id}")},
-            manufacturer=MANUFACTURER,
-            name=DEFAULT_NAME,
-        )
+        super().__init__(coordinator, config_entry, location_name, "weather")
+        self._attr_name = self.location_label
+        # 每種預報最後一次回傳的列表，資料未更新前重複呼叫直接沿用
+        self._forecast_lists: dict[str, tuple[tuple[Forecast, ...], list[Forecast]]] = {}
+        # 每種預報最後一次通知訂閱者時的資料
+        self._notified_forecasts: dict[str, tuple[Forecast, ...] | None] = {}
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data and notify subscribers of the forecasts that changed."""
+        super()._handle_coordinator_update()
+        snapshot = self.snapshot
+        forecasts = {
+            "hourly": snapshot.hourly_forecast if snapshot else None,
+            "daily": snapshot.daily_forecast if snapshot else None,
+            "twice_daily": snapshot.twice_daily_forecast if snapshot else None,
+        }
+        # 時段切換或觀測更新時預報沒有改變，不需要重新傳送
+        changed = [
+            forecast_type
+            for forecast_type, forecast in forecasts.items()
+            if forecast is not self._notified_forecasts.get(forecast_type)
+        ]
+        if changed:
+            self._notified_forecasts.update(forecasts)
+            self.hass.async_create_task(self.async_update_listeners(changed))
 
     @property
     def condition(self) -> str | None:
         """Return the current condition."""
-        if not self.coordinator.data:
-            return None
-
-        try:
-            now_time = datetime.now(tz=utc_plus_8).strftime("%Y-%m-%dT%H:%M:00+08:00")
-            return self.coordinator.parser.get_condition(now_time)
-        except (KeyError, IndexError):
+        if not (snapshot := self.snapshot):
             return None
+        return snapshot.condition
 
     @property
     def native_temperature(self) -> float | None:
         """Return the temperature."""
-        if not self.coordinator.data:
-            return None
-
-        try:
-            now_time = datetime.now(tz=utc_plus_8).strftime("%Y-%m-%dT%H:%M:00+08:00")
-            return float(self.coordinator.parser.get_temperature(now_time))
-        except (KeyError, IndexError, ValueError):
+        if not (snapshot := self.snapshot):
             return None
+        return snapshot.native_temperature
 
     @property
     def native_temperature_unit(self) -> str:
@@ -83,65 +98,80 @@ class TaiwanWeather(CoordinatorEntity, WeatherEntity):
     @property
     def humidity(self) -> float | None:
         """Return the humidity."""
-        if not self.coordinator.data:
-            return None
-
-        try:
-            now_time = datetime.now(tz=utc_plus_8).strftime("%Y-%m-%dT%H:%M:00+08:00")
-            return float(self.coordinator.parser.get_humidity(now_time))
-        except (KeyError, IndexError, ValueError):
+        if not (snapshot := self.snapshot):
             return None
+        return snapshot.humidity
 
     @property
     def native_apparent_temperature(self) -> float | None:
         """Return the apparent temperature."""
-        if not self.coordinator.data:
-            return None
-        try:
-            now_time = datetime.now(tz=utc_plus_8).strftime("%Y-%m-%dT%H:%M:00+08:00")
-            return float(self.coordinator.parser.get_apparent_temperature(now_time))
-        except (KeyError, IndexError, ValueError):
+        if not (snapshot := self.snapshot):
             return None
+        return snapshot.native_apparent_temperature
 
     @property
     def wind_bearing(self) -> str | None:
         """Return the wind bearing."""
-        if not self.coordinator.data:
-            return None
-        try:
-            now_time = datetime.now(tz=utc_plus_8).strftime("%Y-%m-%dT%H:%M:00+08:00")
-            return self.coordinator.parser.get_wind_direction(now_time)
-        except (KeyError, IndexError, ValueError):
+        if not (snapshot := self.snapshot):
             return None
+        return snapshot.wind_bearing
 
     @property
     def native_wind_speed(self) -> float | None:
         """Return the wind speed."""
-        if not self.coordinator.data:
+        if not (snapshot := self.snapshot):
             return None
-        try:
-            now_time = datetime.now(tz=utc_plus_8).strftime("%Y-%m-%dT%H:%M:00+08:00")
-            return float(self.coordinator.parser.get_wind_speed(now_time))
-        except (KeyError, IndexError, ValueError):
+        return snapshot.native_wind_speed
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return how old the served data is."""
+        if not (snapshot := self.snapshot):
             return None
+        attributes = {
+            "last_update_time": snapshot.last_update_time,
+            "stale": snapshot.stale,
+        }
+        if snapshot.observation_station is not None:
+            attributes["observation_station"] = snapshot.observation_station
+            attributes["observation_time"] = snapshot.observation_time
+        return attributes
 
     @property
     def native_wind_speed_unit(self) -> str:
         """Return the wind speed unit."""
         return UnitOfSpeed.METERS_PER_SECOND
 
+    def _forecast_list(
+        self, forecast_type: str, forecast: tuple[Forecast, ...] | None
+    ) -> list[Forecast] | None:
+        """Return the forecast as a list, reusing it until the data changes."""
+        if forecast is None:
+            return None
+        cached = self._forecast_lists.get(forecast_type)
+        if cached is None or cached[0] is not forecast:
+            cached = self._forecast_lists[forecast_type] = (forecast, list(forecast))
+        return cached[1]
+
     @property
     def forecast(self) -> list[Forecast] | None:
         """Return the forecast."""
-        if not self.coordinator.data:
-            return None
-
-        try:
-            return self.coordinator.parser.parse_weather_data()
-
-        except (KeyError, IndexError, ValueError):
+        if not (snapshot := self.snapshot):
             return None
+        return self._forecast_list("hourly", snapshot.hourly_forecast)
 
     async def async_forecast_hourly(self) -> list[Forecast] | None:
         """Return the hourly forecast in native units."""
         return self.forecast
+
+    async def async_forecast_daily(self) -> list[Forecast] | None:
+        """Return the daily forecast in native units."""
+        if not (snapshot := self.snapshot):
+            return None
+        return self._forecast_list("daily", snapshot.daily_forecast)
+
+    async def async_forecast_twice_daily(self) -> list[Forecast] | None:
+        """Return the twice daily forecast in native units."""
+        if not (snapshot := self.snapshot):
+            return None
+        return self._forecast_list("twice_daily", snapshot.twice_daily_forecast)
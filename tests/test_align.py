@@ -0,0 +1,215 @@
+"""Compare the single-pass alignment with the original hour-by-hour version."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import gzip
+import json
+from pathlib import Path
+import sys
+from typing import Any
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+ROOT = Path(__file__).parents[1]
+FIXTURES_DIR = ROOT / "benchmarks" / "fixtures"
+sys.path.insert(0, str(ROOT))
+
+from custom_components.taiwan_weather.cwa_data_parser import (  # noqa: E402
+    CWADataParser,
+    ForecastTable,
+)
+
+THREE_DAYS_FIXTURES = ["F-D0047-061", "F-D0047-053", "F-D0047-081", "F-D0047-089"]
+
+
+def legacy_align_time(api_response: dict[str, Any]) -> list[dict[str, Any]]:
+    """Align the elements like CWADataParser._align_time did before the merge pass.
+
+    Frozen copy kept as the reference: every interval is expanded hour by
+    hour into a map, and base times without a match take the nearest key.
+    """
+    weather_elements = api_response["records"]["Locations"][0]["Location"][0].get('WeatherElement', [])
+    if not weather_elements:
+        raise ValueError("找不到天氣元素")
+
+    base_times = []
+    for element in weather_elements:
+        if element["ElementName"] == "溫度":
+            base_times = [data["DataTime"] for data in element["Time"]]
+            break
+
+    if not base_times:
+        raise ValueError("找不到溫度資料作為時間基準")
+
+    aligned_elements = []
+    for element in weather_elements:
+        aligned_element = {"ElementName": element["ElementName"], "Time": []}
+
+        time_value_map = {}
+        for time_data in element["Time"]:
+            time_key = time_data.get("DataTime") or time_data.get("StartTime")
+            time_value_map[time_key] = time_data["ElementValue"]
+
+            if "StartTime" in time_data and "EndTime" in time_data:
+                start = datetime.fromisoformat(time_data["StartTime"])
+                end = datetime.fromisoformat(time_data["EndTime"])
+                current = start
+                while current <= end:
+                    time_value_map[current.isoformat()] = time_data["ElementValue"]
+                    current += timedelta(hours=1)
+
+        for base_time in base_times:
+            value = time_value_map.get(base_time)
+            if value is None:
+                nearest_time = min(
+                    time_value_map.keys(),
+                    key=lambda x: abs(
+                        datetime.fromisoformat(x) - datetime.fromisoformat(base_time)
+                    ),
+                )
+                value = time_value_map[nearest_time]
+
+            aligned_element["Time"].append({"DataTime": base_time, "ElementValue": value})
+
+        aligned_elements.append(aligned_element)
+
+    return aligned_elements
+
+
+def legacy_index(base_times: list[str], epoch: float) -> int:
+    """Return the nearest base time by a linear scan, preferring the earlier one on ties."""
+    return min(
+        range(len(base_times)),
+        key=lambda index: abs(datetime.fromisoformat(base_times[index]).timestamp() - epoch),
+    )
+
+
+def location_responses() -> list[tuple[str, dict[str, Any]]]:
+    """Return a single-location response for every location in the fixtures."""
+    responses = []
+    for dataset_id in THREE_DAYS_FIXTURES:
+        data = json.loads(gzip.decompress((FIXTURES_DIR / f"{dataset_id}.json.gz").read_bytes()))
+        locations = data["records"]["Locations"][0]
+        for location in locations["Location"]:
+            responses.append(
+                (
+                    f"{dataset_id}/{location['LocationName']}",
+                    {"records": {"Locations": [{**locations, "Location": [location]}]}},
+                )
+            )
+    return responses
+
+
+@pytest.mark.parametrize(
+    "api_response",
+    [response for _, response in location_responses()],
+    ids=[name for name, _ in location_responses()],
+)
+def test_align_time_matches_legacy(api_response: dict[str, Any]) -> None:
+    """The merge pass gives the same values at the same index as the old alignment."""
+    legacy = legacy_align_time(api_response)
+    aligned = CWADataParser()._align_time(api_response)
+    assert aligned == legacy
+
+    base_times = [time["DataTime"] for time in legacy[0]["Time"]]
+    table = ForecastTable(
+        base_times,
+        [[time["ElementValue"] for time in element["Time"]] for element in aligned],
+    )
+    first = datetime.fromisoformat(base_times[0]).timestamp()
+    last = datetime.fromisoformat(base_times[-1]).timestamp()
+    # 從第一個時間點前3小時到最後一個時間點後3小時，每15分鐘檢查一次
+    for epoch in range(int(first) - 3 * 3600, int(last) + 3 * 3600, 15 * 60):
+        assert table.nearest(epoch) == legacy_index(base_times, epoch)
+
+
+def hand_built_response(
+    base_times: list[str], *elements: tuple[str, list[tuple[str, ...]]]
+) -> dict[str, Any]:
+    """Return a response with 溫度 at base_times and elements of (time,) or (start, end) points."""
+    weather_elements = [
+        {
+            "ElementName": "溫度",
+            "Time": [
+                {"DataTime": time, "ElementValue": [{"Temperature": str(index)}]}
+                for index, time in enumerate(base_times)
+            ],
+        }
+    ]
+    for name, points in elements:
+        times = []
+        for index, point in enumerate(points):
+            value = [{"Value": f"{name}{index}"}]
+            if len(point) == 1:
+                times.append({"DataTime": point[0], "ElementValue": value})
+            else:
+                times.append({"StartTime": point[0], "EndTime": point[1], "ElementValue": value})
+        weather_elements.append({"ElementName": name, "Time": times})
+    return {
+        "records": {
+            "Locations": [{"Location": [{"LocationName": "測試區", "WeatherElement": weather_elements}]}]
+        }
+    }
+
+
+def t(hour: int, minute: int = 0, day: int = 10) -> str:
+    """Return an ISO 8601 time in Taiwan on a fixed day."""
+    return f"2025-03-{day:02d}T{hour:02d}:{minute:02d}:00+08:00"
+
+
+EVERY_3_HOURS = [t(hour) for hour in range(0, 24, 3)]
+
+MERGE_PASS_CASES = {
+    # 區段之間有空隙，空隙中間的時間點等距
+    "gaps": hand_built_response(
+        EVERY_3_HOURS,
+        ("間隔", [(t(0), t(6)), (t(12), t(15))]),
+        ("長間隔", [(t(1), t(2)), (t(20), t(23))]),
+    ),
+    # 相鄰區段共用邊界，以後面的區段為準
+    "shared_boundaries": hand_built_response(
+        EVERY_3_HOURS,
+        ("相鄰", [(t(0), t(6)), (t(6), t(12)), (t(12), t(18)), (t(18), t(0, day=11))]),
+        ("十二小時", [(t(0), t(12)), (t(12), t(0, day=11))]),
+    ),
+    # 基準時間與兩側資料等距時取較早的資料
+    "ties": hand_built_response(
+        EVERY_3_HOURS,
+        ("時間點", [(t(0),), (t(6),), (t(12),), (t(18),)]),
+        ("區段", [(t(0), t(1)), (t(5), t(7)), (t(11), t(13))]),
+    ),
+    # 基準時間或區段不在整點
+    "half_hour_offsets": hand_built_response(
+        [t(hour, 30) for hour in range(0, 24, 3)],
+        ("整點", [(t(0), t(6)), (t(6), t(12)), (t(12), t(0, day=11))]),
+        ("半點", [(t(0, 30), t(5, 30)), (t(8, 30), t(12)), (t(12), t(17, 30))]),
+        ("時間點", [(t(1),), (t(4, 30),), (t(11, 45),), (t(21, 15),)]),
+    ),
+    "half_hour_base_on_whole_hours": hand_built_response(
+        [t(0), t(2, 30), t(5), t(7, 30), t(10)],
+        ("三小時", [(t(0), t(3)), (t(3), t(6)), (t(6), t(9)), (t(9), t(12))]),
+    ),
+    # 時間點資料缺少部分基準時間
+    "missing_points": hand_built_response(
+        EVERY_3_HOURS,
+        ("缺值", [(t(0),), (t(6),), (t(9),), (t(18),)]),
+        ("稀疏", [(t(4),), (t(20),)]),
+    ),
+    # 區段在基準時間之前開始或之後結束
+    "outside_base_times": hand_built_response(
+        [t(6), t(9), t(12)],
+        ("前後", [(t(0), t(4)), (t(13), t(20))]),
+        ("前一天", [(t(20, day=9),), (t(23, day=9),)]),
+    ),
+}
+
+
+@pytest.mark.parametrize(
+    "api_response", MERGE_PASS_CASES.values(), ids=MERGE_PASS_CASES.keys()
+)
+def test_merge_pass_matches_legacy(api_response: dict[str, Any]) -> None:
+    """Irregular intervals and points are aligned like the old alignment."""
+    assert CWADataParser()._align_time(api_response) == legacy_align_time(api_response)
@@ -0,0 +1,92 @@
+"""Align weekly elements whose periods differ from 平均溫度."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+from typing import Any
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+sys.path.insert(0, str(Path(__file__).parents[1]))
+
+from custom_components.taiwan_weather.cwa_data_parser import (  # noqa: E402
+    CWAWeeklyDataParser,
+)
+
+PERIODS = [
+    ("2025-03-10T18:00:00+08:00", "2025-03-11T06:00:00+08:00"),
+    ("2025-03-11T06:00:00+08:00", "2025-03-11T18:00:00+08:00"),
+    ("2025-03-11T18:00:00+08:00", "2025-03-12T06:00:00+08:00"),
+    ("2025-03-12T06:00:00+08:00", "2025-03-12T18:00:00+08:00"),
+]
+
+
+def weekly_response(elements: dict[str, list[tuple[tuple[str, str], dict[str, str]]]]) -> dict[str, Any]:
+    """Return a single-location weekly response with the given periods per element."""
+    return {
+        "records": {
+            "Locations": [
+                {
+                    "Location": [
+                        {
+                            "LocationName": "測試區",
+                            "WeatherElement": [
+                                {
+                                    "ElementName": name,
+                                    "Time": [
+                                        {"StartTime": start, "EndTime": end, "ElementValue": [value]}
+                                        for (start, end), value in periods
+                                    ],
+                                }
+                                for name, periods in elements.items()
+                            ],
+                        }
+                    ]
+                }
+            ]
+        }
+    }
+
+
+def test_daytime_only_uv_index_leaves_nights_empty() -> None:
+    """Nights get no UV index instead of the value of a neighbouring day."""
+    parser = CWAWeeklyDataParser()
+    parser.load_api_response(
+        weekly_response(
+            {
+                "平均溫度": [(period, {"Temperature": "20"}) for period in PERIODS],
+                "紫外線指數": [
+                    (PERIODS[1], {"UVIndex": "7", "UVExposureLevel": "高量級"}),
+                    (PERIODS[3], {"UVIndex": "3", "UVExposureLevel": "低量級"}),
+                ],
+            }
+        )
+    )
+
+    twice_daily = parser.parse_twice_daily_forecast()
+    assert [period["uv_index"] for period in twice_daily] == [None, 7.0, None, 3.0]
+
+    daily = parser.parse_daily_forecast()
+    assert [day["uv_index"] for day in daily] == [None, 7.0, 3.0]
+
+
+def test_shifted_periods_use_the_covering_period() -> None:
+    """A period takes the value of the element period that covers its start."""
+    parser = CWAWeeklyDataParser()
+    parser.load_api_response(
+        weekly_response(
+            {
+                "平均溫度": [(period, {"Temperature": "20"}) for period in PERIODS],
+                "12小時降雨機率": [
+                    (("2025-03-10T12:00:00+08:00", "2025-03-11T12:00:00+08:00"), {"ProbabilityOfPrecipitation": "40"}),
+                    (("2025-03-11T12:00:00+08:00", "2025-03-12T00:00:00+08:00"), {"ProbabilityOfPrecipitation": "60"}),
+                ],
+            }
+        )
+    )
+
+    twice_daily = parser.parse_twice_daily_forecast()
+    assert [period["precipitation_probability"] for period in twice_daily] == [40, 40, 60, None]